@@ -0,0 +1,122 @@
+import json
+from datetime import date
+from urllib.parse import parse_qsl
+
+from pymongo import AsyncMongoClient
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date
+
+from MongoDBDataStoreUtilities import (
+    MONGO_URI, MONGO_DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE,
+    TOP_LIKED_PIPELINE, InvalidCursor, format_top_liked, page_spec, page_result
+)
+
+# Async variant of the review read endpoints in mongo_bp, as a small ASGI app
+# backed by pymongo's AsyncMongoClient. A sync worker thread is parked for every
+# Mongo round-trip; here a single worker keeps many review queries in flight on
+# one event loop. Paths and responses match the blueprint (including ?limit,
+# ?after and ?fields), so the frontend can be pointed at either server.
+#
+#   uvicorn AsyncReviewService:app --port 5002 --workers 2
+#
+# Writes, bulk ingestion and ?format=ndjson exports stay on the Flask app.
+# Configured through the same MONGO_* environment variables.
+
+_client = None
+
+def get_async_collection(name):
+    global _client
+    if _client is None:
+        # Created inside the running event loop of this worker process
+        _client = AsyncMongoClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE
+        )
+    return _client[MONGO_DB_NAME][name]
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+def json_default(value):
+    # Same date format as Flask's jsonify
+    if isinstance(value, date):
+        return http_date(value)
+    return str(value)
+
+async def find_page(args, query):
+    query, projection, limit = page_spec(args, query)
+    cursor = get_async_collection('product_reviews').find(query, projection).sort('_id', 1)
+    if limit is None:
+        return await cursor.to_list()
+    return page_result(await cursor.limit(limit + 1).to_list(), limit)
+
+async def get_product_reviews(args):
+    return await find_page(args, {})
+
+async def get_product_reviews_by_id(args, product_id):
+    return await find_page(args, {'ProductModelName': product_id})
+
+async def get_top_liked_products(args):
+    cursor = await get_async_collection('product_review_stats').aggregate(TOP_LIKED_PIPELINE)
+    return format_top_liked(await cursor.to_list())
+
+def route(path):
+    if path == '/api/product-reviews':
+        return get_product_reviews, ()
+    if path == '/api/trending/liked-products':
+        return get_top_liked_products, ()
+    # ASGI servers hand over scope['path'] already percent-decoded
+    prefix = '/api/product-reviews/'
+    product_id = path[len(prefix):] if path.startswith(prefix) else ''
+    if product_id and '/' not in product_id:
+        return get_product_reviews_by_id, (product_id,)
+    return None, ()
+
+async def send_json(send, status, body):
+    payload = json.dumps(body, default=json_default).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode()),
+            (b'access-control-allow-origin', b'*')
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    handler, path_args = route(scope['path'])
+    if handler is None:
+        return await send_json(send, 404, {'error': 'Not found'})
+    if scope['method'] not in ('GET', 'HEAD'):
+        return await send_json(send, 405, {'error': 'Method not allowed'})
+
+    args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+    try:
+        body = await handler(args, *path_args)
+    except InvalidCursor as e:
+        return await send_json(send, 400, {'error': str(e)})
+    except Exception as e:
+        print(f"Error fetching reviews (async): {e}")
+        return await send_json(send, 500, {'error': str(e)})
+    await send_json(send, 200, body)
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# In-process cache for catalog reads (product list, single products, searches).
+# Every entry is tagged with the generation it was loaded under; bump() moves the
+# generation forward so all older entries become misses at once. Entries also
+# expire after `ttl` seconds, which bounds staleness when another worker process
+# changed the catalog, and the cache never holds more than `max_entries` items.
+# invalidate() drops single keys for changes that only touch a few products.
+# Documents loaded with stock=True (lists, searches) also carry the stock
+# generation; stock_changed() moves it forward so they miss on the next read
+# while the rest of the cache stays warm.
+class CatalogCache:
+    def __init__(self, ttl=300, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self.stock_generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (generation, stock_generation or None, loaded_at, value)
+        self._sequence = 0
+        self._invalidated = {}  # key -> _sequence of its last invalidate(), cleared by bump()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, stock=False):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._fresh(entry, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[3]
+                del self._entries[key]
+            self.misses += 1
+            generation, sequence = self.generation, self._sequence
+            stock_generation = self.stock_generation if stock else None
+
+        # Load outside the lock so a slow query does not block cached reads
+        value = loader()
+
+        with self._lock:
+            # Don't store results loaded before a concurrent bump(), invalidate()
+            # or, for stock-dependent documents, stock_changed()
+            if self._storable(key, generation, sequence) and stock_generation in (None, self.stock_generation):
+                self._entries[key] = (generation, stock_generation, now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def get_many(self, keys, loader):
+        # Like get() for several keys: loader(missing_keys) is called once with
+        # every key that was not cached and returns {key: value}; keys it leaves
+        # out are cached as None, the same as a get() loader returning None.
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if self._fresh(entry, now):
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        found[key] = entry[3]
+                        continue
+                    del self._entries[key]
+                self.misses += 1
+                missing.append(key)
+            generation, sequence = self.generation, self._sequence
+
+        if not missing:
+            return found
+        loaded = loader(missing)
+
+        with self._lock:
+            for key in missing:
+                found[key] = loaded.get(key)
+                if self._storable(key, generation, sequence):
+                    self._entries[key] = (generation, None, now, found[key])
+                    self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return found
+
+    def _fresh(self, entry, now):
+        # Caller holds the lock
+        generation, stock_generation, loaded_at, value = entry
+        return (generation == self.generation
+                and stock_generation in (None, self.stock_generation)
+                and now - loaded_at < self.ttl)
+
+    def _storable(self, key, generation, sequence):
+        # Caller holds the lock
+        return generation == self.generation and self._invalidated.get(key, 0) <= sequence
+
+    def invalidate(self, keys):
+        with self._lock:
+            self._sequence += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._invalidated[key] = self._sequence
+
+    def stock_changed(self, keys=()):
+        # Only available_items changed: drops `keys` (the affected product
+        # documents) and every stock-dependent document, nothing else
+        with self._lock:
+            self.stock_generation += 1
+            for key in [key for key, entry in self._entries.items() if entry[1] is not None]:
+                del self._entries[key]
+        self.invalidate(keys)
+        return self.stock_generation
+
+    def bump(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._invalidated.clear()
+            return self.generation
+
+    def stats(self):
+        with self._lock:
+            return {
+                'generation': self.generation,
+                'stock_generation': self.stock_generation,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
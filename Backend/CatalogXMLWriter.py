@@ -0,0 +1,176 @@
+import atexit
+import os
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, in-process lock only
+    fcntl = None
+
+
+# Keeps ProductCatalog.xml in sync with product add/update/delete.
+#
+# Edits are queued and coalesced: a flush runs `flush_delay` seconds after the
+# last edit, so a burst of admin changes costs one write. The parsed tree is
+# kept in memory with an id -> element (and name -> element) index, so applying
+# an edit is O(1) instead of a scan of the whole catalog. A flush holds an
+# exclusive lock on `<path>.lock` so writers in other worker processes are
+# serialized; if another process rewrote the file since we last read it, the
+# tree is re-parsed before our edits are applied. The new document is written to
+# a temp file in the same directory and moved over the original with
+# os.replace, so readers never see a half-written catalog. A flush that fails
+# keeps its edits queued and is retried `retry_delay` seconds later.
+class CatalogXMLWriter:
+    def __init__(self, path, flush_delay=0.5, retry_delay=5.0):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.retry_delay = retry_delay
+        self._tree = None
+        self._by_id = {}
+        self._by_name = {}
+        self._loaded_stat = None
+        self._pending = []  # (operation, product_data)
+        self._timer = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def apply(self, operation, product_data):
+        with self._lock:
+            self._pending.append((operation, dict(product_data)))
+            self._schedule(self.flush_delay)
+
+    def _schedule(self, delay):
+        # Caller holds the lock
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error updating XML catalog, retrying in {self.retry_delay}s: {e}")
+            with self._lock:
+                if self._timer is None:  # An apply() in the meantime already scheduled a flush
+                    self._schedule(self.retry_delay)
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+
+            # Edits are only taken off the queue once the lock is held, so a
+            # lock file that cannot be opened or locked leaves them queued
+            with open(self.path + '.lock', 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                pending, self._pending = self._pending, []
+                try:
+                    self._reload_if_changed()
+                    for operation, product_data in pending:
+                        self._apply_one(operation, product_data)
+                    self._write()
+                except BaseException:
+                    # Nothing was written: keep the edits for the next flush, which
+                    # re-reads the file since the tree may be half-edited
+                    self._pending = pending + self._pending
+                    self._tree = None
+                    raise
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+            print(f"XML catalog updated successfully for {len(pending)} change(s)")
+
+    def _file_stat(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _reload_if_changed(self):
+        if self._tree is not None and self._loaded_stat == self._file_stat():
+            return
+        self._tree = ET.parse(self.path)
+        self._by_id = {}
+        self._by_name = {}
+        for product in self._tree.getroot().findall('product'):
+            self._index(product)
+        self._loaded_stat = self._file_stat()
+
+    def _index(self, product):
+        product_id = product.findtext('id')
+        name = product.findtext('name')
+        if product_id:
+            self._by_id[product_id] = product
+        if name:
+            self._by_name[name] = product
+
+    def _unindex(self, product):
+        if self._by_id.get(product.findtext('id')) is product:
+            del self._by_id[product.findtext('id')]
+        if self._by_name.get(product.findtext('name')) is product:
+            del self._by_name[product.findtext('name')]
+
+    def _find(self, product_data):
+        # Same matching rule as before: by id, or by name for catalog entries
+        # whose <id> predates the database UUIDs
+        product = self._by_id.get(str(product_data.get('id')))
+        if product is None and product_data.get('name') is not None:
+            product = self._by_name.get(str(product_data['name']))
+        return product
+
+    def _apply_one(self, operation, product_data):
+        root = self._tree.getroot()
+        product = self._find(product_data)
+
+        if operation == 'delete':
+            if product is not None:
+                self._unindex(product)
+                root.remove(product)
+            return
+
+        if product is None:
+            # 'add', or an 'update' for a product that is not in the file yet
+            product = ET.SubElement(root, 'product')
+        else:
+            self._unindex(product)
+        self._write_fields(product, product_data)
+        self._index(product)
+
+    @staticmethod
+    def _write_fields(product, product_data):
+        for key, value in product_data.items():
+            if key == 'accessories':
+                accessories = product.find('accessories')
+                if accessories is None:
+                    accessories = ET.SubElement(product, 'accessories')
+                accessories.clear()
+                for accessory in value:
+                    acc_elem = ET.SubElement(accessories, 'accessory')
+                    ET.SubElement(acc_elem, 'name').text = str(accessory['name'])
+                    ET.SubElement(acc_elem, 'price').text = str(accessory['price'])
+            else:
+                elem = product.find(key)
+                if elem is None:
+                    elem = ET.SubElement(product, key)
+                elem.text = str(value)
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix='.ProductCatalog.', suffix='.xml', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                self._tree.write(temp_file, encoding='utf-8', xml_declaration=True)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._loaded_stat = self._file_stat()
@@ -1,59 +1,478 @@
-from pymongo import MongoClient
-from flask import Blueprint, request, jsonify
+from pymongo import MongoClient, IndexModel, UpdateOne, ReplaceOne, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from datetime import datetime, timedelta
+import os
 import random
+import sys
+import time
+import argparse
+import itertools
+import queue
+import threading
 from bson import ObjectId
+from bson.errors import InvalidId
 from bson import json_util
+import json
+from WriteBehindQueue import WriteBehindQueue
 
 mongo_bp = Blueprint('mongo', __name__)
 
 # MongoDB configurations
-mongo_client = MongoClient('mongodb://localhost:27017/')
-mongo_db = mongo_client['smarthomes']
-reviews_collection = mongo_db['product_reviews']
-flags_collection = mongo_db['flags']
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
+MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'smarthomes')
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+
+# Write-behind mode for POST /api/product-review (off by default): reviews are
+# queued and inserted in batches by a background thread. REVIEW_SPOOL_DIR adds a
+# local append-only spool so queued reviews survive a crash.
+REVIEW_WRITE_BEHIND = os.environ.get('REVIEW_WRITE_BEHIND', 'false').lower() == 'true'
+REVIEW_QUEUE_SIZE = int(os.environ.get('REVIEW_QUEUE_SIZE', 10000))
+REVIEW_FLUSH_BATCH_SIZE = int(os.environ.get('REVIEW_FLUSH_BATCH_SIZE', 500))
+REVIEW_FLUSH_INTERVAL_MS = int(os.environ.get('REVIEW_FLUSH_INTERVAL_MS', 200))
+REVIEW_ENQUEUE_TIMEOUT = float(os.environ.get('REVIEW_ENQUEUE_TIMEOUT', 0.5))  # Seconds before a full queue answers 503
+REVIEW_SPOOL_DIR = os.environ.get('REVIEW_SPOOL_DIR')
+
+# MongoClient is not fork-safe, so each process creates its own on first use.
+# A client inherited from a pre-fork parent (gunicorn --preload) is replaced.
+_mongo_client = None
+_mongo_client_pid = None
+_mongo_client_lock = threading.Lock()
 
 def get_mongo_connection():
-    return mongo_client
+    global _mongo_client, _mongo_client_pid
+    if _mongo_client is None or _mongo_client_pid != os.getpid():
+        with _mongo_client_lock:
+            if _mongo_client is None or _mongo_client_pid != os.getpid():
+                _mongo_client = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    connect=False  # Connects on first operation
+                )
+                _mongo_client_pid = os.getpid()
+    return _mongo_client
+
+def get_reviews_collection():
+    return get_mongo_connection()[MONGO_DB_NAME]['product_reviews']
+
+def get_flags_collection():
+    return get_mongo_connection()[MONGO_DB_NAME]['flags']
+
+def get_review_stats_collection():
+    return get_mongo_connection()[MONGO_DB_NAME]['product_review_stats']
+
+# Indexes backing the review queries; create_indexes is a no-op for indexes that already exist
+REVIEW_INDEXES = [
+    IndexModel([('ProductModelName', ASCENDING), ('ReviewDate', DESCENDING)], name='product_review_date'),
+    IndexModel([('ProductModelName', ASCENDING), ('ReviewRating', ASCENDING)], name='product_rating'),
+    IndexModel([('ReviewRating', DESCENDING)], name='review_rating'),
+    IndexModel([('StoreZip', ASCENDING)], name='store_zip'),
+]
+
+def ensure_review_indexes():
+    try:
+        created = get_reviews_collection().create_indexes(REVIEW_INDEXES)
+        print(f"Review indexes ready: {', '.join(created)}")
+    except Exception as e:
+        print(f"Error creating review indexes: {e}")
+
+# Keyset pagination / projection for review lists, mirroring list_page in
+# MySQLDataStoreUtilities: ?fields=a,b is pushed into the find() projection and
+# ?limit=N&after=<next_after> pages on _id. Without ?limit a plain array is returned.
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 1000
+INGEST_BATCH_SIZE = 1000
+
+# A malformed ?after= cursor. Every list endpoint answers it with a 400, here
+# and in list_page / ndjson_export of MySQLDataStoreUtilities.
+class InvalidCursor(ValueError):
+    pass
+
+def object_id_cursor(after):
+    try:
+        return ObjectId(after)
+    except (InvalidId, TypeError):
+        raise InvalidCursor('after must be the next_after value of a previous page')
+
+# Shared by find_page and the async service (AsyncReviewService.py):
+# turns ?fields/?after/?limit into (query, projection, limit); limit is None
+# for the legacy full-array response.
+def page_spec(args, query):
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()]
+    projection = {field: 1 for field in fields} if fields else {}
+
+    after = args.get('after')
+    if after is not None:
+        query = {**query, '_id': {'$gt': object_id_cursor(after)}}
+
+    limit = args.get('limit', type=int)
+    if limit is None:
+        return query, {**projection, '_id': 0}, None
+    return query, projection or None, min(max(limit, 1), MAX_PAGE_SIZE)
+
+# Documents were fetched with limit + 1, the extra one only tells us there is a next page
+def page_result(documents, limit):
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_after = str(documents[-1]['_id']) if has_more else None
+    for document in documents:
+        document.pop('_id', None)
+    return {'items': documents, 'next_after': next_after}
+
+def find_page(collection, query):
+    query, projection, limit = page_spec(request.args, query)
+    if limit is None:
+        return list(collection.find(query, projection).sort('_id', 1))
+    return page_result(list(collection.find(query, projection).sort('_id', 1).limit(limit + 1)), limit)
+
+# ?format=ndjson export: streams one review per line from a batched cursor
+# instead of materializing the whole collection. Honors ?fields= and ?after=.
+def ndjson_export(collection, query):
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    projection = {field: 1 for field in fields} if fields else {}
+
+    after = request.args.get('after')
+    if after is not None:
+        query = {**query, '_id': {'$gt': object_id_cursor(after)}}
+    cursor = collection.find(query, {**projection, '_id': 0}).sort('_id', 1).batch_size(EXPORT_BATCH_SIZE)
+
+    def generate():
+        for document in cursor:
+            yield json.dumps(document, default=str) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# Average rating per product, best first; ties go to the product with more reviews.
+# Runs over product_review_stats (one document per product), not the raw reviews.
+TOP_LIKED_PIPELINE = [
+    {'$match': {'ReviewCount': {'$gt': 0}}},
+    {'$project': {
+        '_id': 0,
+        'ProductModelName': '$_id',
+        'ReviewRating': {'$divide': ['$RatingSum', '$ReviewCount']},
+        'ReviewCount': 1
+    }},
+    {'$sort': {'ReviewRating': -1, 'ReviewCount': -1, 'ProductModelName': 1}},
+    {'$limit': 5}
+]
+
+def format_top_liked(products):
+    products = list(products)
+    for product in products:
+        product['ReviewRating'] = round(product['ReviewRating'] or 0, 2)
+    return products
+
+def top_liked_products():
+    prepare_reviews_collection()  # Also called outside the blueprint (trending snapshot)
+    return format_top_liked(get_review_stats_collection().aggregate(TOP_LIKED_PIPELINE))
 
 @mongo_bp.route('/api/trending/liked-products', methods=['GET'])
 def get_top_liked_products():
     try:
-        # Fetch top 5 liked products from MongoDB
-        top_liked_products = list(reviews_collection.find().sort("ReviewRating", -1).limit(5))
-
-        # Convert ObjectId to string for each product
-        for product in top_liked_products:
-            product['_id'] = str(product['_id'])  # Convert ObjectId to string
-            # Convert any other potential ObjectId fields
-            for key, value in product.items():
-                if isinstance(value, ObjectId):
-                    product[key] = str(value)
-
-        return jsonify(top_liked_products), 200
+        return jsonify(top_liked_products()), 200
     except Exception as e:
         print(f"Error fetching top liked products: {e}")
         return jsonify({"error": str(e)}), 500
 
+# product_review_stats keeps one document per product (_id is the
+# ProductModelName): ReviewCount, RatingSum, RatingHistogram ({'1'..'5': n}) and
+# LastReviewDate. Every review write applies $inc / $max deltas to it, so ratings
+# are a single-document read. rebuild_review_stats re-derives it from product_reviews.
+def review_rating(review):
+    # Ratings from the review form arrive as strings
+    try:
+        rating = int(review.get('ReviewRating'))
+    except (TypeError, ValueError):
+        return None
+    return rating if 1 <= rating <= 5 else None
+
+def review_date(review):
+    value = review.get('ReviewDate')
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = None
+    return value if isinstance(value, datetime) else review.get('timestamp')
+
+def review_stats_deltas(reviews):
+    deltas = {}
+    for review in reviews:
+        product, rating = review.get('ProductModelName'), review_rating(review)
+        if not product or rating is None:
+            continue
+        delta = deltas.setdefault(product, {'ReviewCount': 0, 'RatingSum': 0, 'RatingHistogram': {}, 'LastReviewDate': None})
+        delta['ReviewCount'] += 1
+        delta['RatingSum'] += rating
+        delta['RatingHistogram'][str(rating)] = delta['RatingHistogram'].get(str(rating), 0) + 1
+        reviewed_at = review_date(review)
+        if reviewed_at and (delta['LastReviewDate'] is None or reviewed_at > delta['LastReviewDate']):
+            delta['LastReviewDate'] = reviewed_at
+    return deltas
+
+# Called with no arguments after product_review_stats changed (e.g. to refresh
+# the trending snapshot); registered by the app so this module has no back-import
+review_stats_listeners = []
+
+def notify_review_stats_listeners():
+    for listener in review_stats_listeners:
+        listener()
+
+def record_review_stats(reviews):
+    operations = []
+    for product, delta in review_stats_deltas(reviews).items():
+        increments = {'ReviewCount': delta['ReviewCount'], 'RatingSum': delta['RatingSum']}
+        for rating, count in delta['RatingHistogram'].items():
+            increments[f'RatingHistogram.{rating}'] = count
+        update = {'$inc': increments}
+        if delta['LastReviewDate']:
+            update['$max'] = {'LastReviewDate': delta['LastReviewDate']}
+        operations.append(UpdateOne({'_id': product}, update, upsert=True))
+    if operations:
+        get_review_stats_collection().bulk_write(operations, ordered=False)
+        notify_review_stats_listeners()
+
+def rebuild_review_stats():
+    # Full rescan of product_reviews; reviews written while it runs may be
+    # counted twice or missed, so run it when review traffic is quiet
+    get_reviews_collection().update_many({'StatsPending': True}, {'$unset': {'StatsPending': ''}})
+    reviews = get_reviews_collection().find(
+        {}, {'_id': 0, 'ProductModelName': 1, 'ReviewRating': 1, 'ReviewDate': 1, 'timestamp': 1}
+    ).batch_size(EXPORT_BATCH_SIZE)
+    deltas = review_stats_deltas(reviews)
+
+    stats = get_review_stats_collection()
+    operations = [ReplaceOne({'_id': product}, delta, upsert=True) for product, delta in deltas.items()]
+    if operations:
+        stats.bulk_write(operations, ordered=False)
+    stats.delete_many({'_id': {'$nin': list(deltas)}})
+    notify_review_stats_listeners()
+    print(f"Rebuilt review stats for {len(deltas)} products")
+    return len(deltas)
+
+def review_stats_response(product, document):
+    document = document or {}
+    count = document.get('ReviewCount', 0)
+    histogram = document.get('RatingHistogram', {})
+    return {
+        'ProductModelName': product,
+        'ReviewCount': count,
+        'AverageRating': round(document.get('RatingSum', 0) / count, 2) if count else None,
+        'RatingHistogram': {str(rating): histogram.get(str(rating), 0) for rating in range(1, 6)},
+        'LastReviewDate': document.get('LastReviewDate')
+    }
+
+@mongo_bp.route('/api/product-review-stats/<string:product_id>', methods=['GET'])
+def get_product_review_stats(product_id):
+    try:
+        document = get_review_stats_collection().find_one({'_id': product_id})
+        return jsonify(review_stats_response(product_id, document)), 200
+    except Exception as e:
+        print(f"Error fetching review stats for product {product_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@mongo_bp.route('/api/product-review-stats', methods=['GET'])
+def get_review_stats():
+    # ?products=a,b,c for a page of product cards (in that order); all products otherwise
+    try:
+        products = [product.strip() for product in request.args.get('products', '').split(',') if product.strip()]
+        if products:
+            documents = {document['_id']: document for document in get_review_stats_collection().find({'_id': {'$in': products}})}
+            stats = [review_stats_response(product, documents.get(product)) for product in products]
+        else:
+            stats = [review_stats_response(document['_id'], document)
+                     for document in get_review_stats_collection().find().sort('_id', 1)]
+        return jsonify(stats), 200
+    except Exception as e:
+        print(f"Error fetching review stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# One write-behind queue per process, created on first use (threads do not survive a fork)
+_review_queue = None
+_review_queue_pid = None
+_review_queue_lock = threading.Lock()
+
+# Queued reviews carry their _id, so a batch replayed from the spool after it
+# was already written only produces duplicate-key errors, which insert_reviews skips
+def get_review_queue():
+    global _review_queue, _review_queue_pid
+    if _review_queue is None or _review_queue_pid != os.getpid():
+        with _review_queue_lock:
+            if _review_queue is None or _review_queue_pid != os.getpid():
+                _review_queue = WriteBehindQueue(
+                    insert_reviews,
+                    max_size=REVIEW_QUEUE_SIZE,
+                    batch_size=REVIEW_FLUSH_BATCH_SIZE,
+                    flush_interval=REVIEW_FLUSH_INTERVAL_MS / 1000,
+                    spool_dir=REVIEW_SPOOL_DIR,
+                    name='reviews'
+                )
+                _review_queue_pid = os.getpid()
+    return _review_queue
+
+def close_review_queue():
+    # Flush-on-shutdown hook (also registered with atexit by the queue itself)
+    if _review_queue is not None and _review_queue_pid == os.getpid():
+        _review_queue.close()
+
 @mongo_bp.route('/api/product-review', methods=['POST'])
 def submit_product_review():
     data = request.json
     try:
         # Add timestamp to the review data
         data['timestamp'] = datetime.utcnow()
+        if REVIEW_WRITE_BEHIND:
+            data['_id'] = ObjectId()
+            try:
+                get_review_queue().put(data, timeout=REVIEW_ENQUEUE_TIMEOUT)
+            except queue.Full:
+                return jsonify({'error': 'Too many reviews are waiting to be saved, try again shortly'}), 503, {'Retry-After': '1'}
+            return jsonify({'message': 'Review accepted', 'id': str(data['_id'])}), 202
         # Insert the review data into MongoDB
-        result = reviews_collection.insert_one(data)
+        result = get_reviews_collection().insert_one(data)
+        record_review_stats([data])
         return jsonify({'message': 'Review submitted successfully', 'id': str(result.inserted_id)}), 201
     except Exception as e:
         print(f"Error saving review: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Bulk review ingestion, shared by /api/product-reviews/bulk and the
+# `python MongoDBDataStoreUtilities.py load-reviews` CLI.
+def validate_review(document):
+    # Returns (review, None) or (None, reason)
+    if not isinstance(document, dict):
+        return None, 'review must be a JSON object'
+    if not document.get('ProductModelName'):
+        return None, 'ProductModelName is required'
+    try:
+        rating = int(document.get('ReviewRating'))
+    except (TypeError, ValueError):
+        return None, 'ReviewRating must be a number'
+    if not 1 <= rating <= 5:
+        return None, 'ReviewRating must be between 1 and 5'
+
+    review = dict(document)
+    review.pop('_id', None)
+    review['ReviewRating'] = rating
+    if isinstance(review.get('ReviewDate'), str):
+        try:
+            review['ReviewDate'] = datetime.fromisoformat(review['ReviewDate'])
+        except ValueError:
+            return None, 'ReviewDate must be an ISO date'
+    review['timestamp'] = datetime.utcnow()
+    return review, None
+
+def insert_reviews(reviews):
+    # insert_many(ordered=False); only the reviews that were inserted are added
+    # to product_review_stats. Reviews are stored with StatsPending set until
+    # their stats are recorded, so when a batch is written again (write-behind
+    # retry, spool replay) the duplicate-key reviews whose stats never made it
+    # are still counted, and the others are not counted twice.
+    # Returns (inserted, write_errors).
+    for review in reviews:
+        review['StatsPending'] = True
+    failed, write_errors = set(), []
+    try:
+        inserted = len(get_reviews_collection().insert_many(reviews, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        inserted = e.details.get('nInserted', 0)
+        write_errors = e.details.get('writeErrors', [])
+        failed = {error.get('index') for error in write_errors}
+        duplicates = [reviews[error['index']]['_id'] for error in write_errors if error.get('code') == 11000]
+        if duplicates:
+            pending = {document['_id'] for document in get_reviews_collection().find(
+                {'_id': {'$in': duplicates}, 'StatsPending': True}, {'_id': 1})}
+            failed -= {position for position, review in enumerate(reviews) if review['_id'] in pending}
+    counted = [review for position, review in enumerate(reviews) if position not in failed]
+    record_review_stats(counted)
+    if counted:
+        get_reviews_collection().update_many(
+            {'_id': {'$in': [review['_id'] for review in counted]}}, {'$unset': {'StatsPending': ''}}
+        )
+    return inserted, write_errors
+
+def ingest_reviews(documents, batch_size=INGEST_BATCH_SIZE):
+    # Validates and writes reviews with insert_many(ordered=False), one batch at a
+    # time so memory stays bounded for streamed input. Yields a report per batch.
+    batch, rejects = [], []
+    batch_number = 0
+
+    def flush():
+        started = time.perf_counter()
+        inserted = 0
+        if batch:
+            inserted, write_errors = insert_reviews(batch)
+            rejects.extend({'error': error.get('errmsg')} for error in write_errors)
+        elapsed = time.perf_counter() - started
+        return {
+            'batch': batch_number,
+            'inserted': inserted,
+            'rejected': len(rejects),
+            'errors': rejects[:10],
+            'seconds': round(elapsed, 4),
+            'docs_per_second': round(inserted / elapsed) if elapsed > 0 else inserted
+        }
+
+    for position, document in enumerate(documents):
+        review, error = validate_review(document)
+        if error:
+            rejects.append({'index': position, 'error': error})
+        else:
+            batch.append(review)
+        if len(batch) + len(rejects) >= batch_size:
+            batch_number += 1
+            yield flush()
+            batch, rejects = [], []
+
+    if batch or rejects:
+        batch_number += 1
+        yield flush()
+
+def read_ndjson(lines):
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None  # Counted as a reject by validate_review
+
+@mongo_bp.route('/api/product-reviews/bulk', methods=['POST'])
+def bulk_submit_product_reviews():
+    # Accepts a JSON array (sample_reviews.json shape) or an application/x-ndjson stream
+    try:
+        batch_size = min(max(request.args.get('batch_size', INGEST_BATCH_SIZE, type=int), 1), 10000)
+        if request.mimetype == 'application/x-ndjson':
+            documents = read_ndjson(request.stream)
+        else:
+            documents = request.get_json()
+            if not isinstance(documents, list):
+                return jsonify({'error': 'Expected a JSON array of reviews'}), 400
+
+        batches = list(ingest_reviews(documents, batch_size))
+        return jsonify({
+            'inserted': sum(report['inserted'] for report in batches),
+            'rejected': sum(report['rejected'] for report in batches),
+            'batches': batches
+        }), 201
+    except Exception as e:
+        print(f"Error bulk saving reviews: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @mongo_bp.route('/api/product-reviews', methods=['GET'])
 def get_product_reviews():
     try:
+        if request.args.get('format') == 'ndjson':
+            return ndjson_export(get_reviews_collection(), {})
         # Retrieve all reviews from MongoDB
-        reviews = list(reviews_collection.find({}, {'_id': 0}))
+        reviews = find_page(get_reviews_collection(), {})
         return jsonify(reviews), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching reviews: {e}")
         return jsonify({'error': str(e)}), 500
@@ -62,98 +481,112 @@ def get_product_reviews():
 def get_product_reviews_by_id(product_id):
     try:
         # Retrieve reviews for a specific product
-        reviews = list(reviews_collection.find({'ProductModelName': product_id}, {'_id': 0}))
+        if request.args.get('format') == 'ndjson':
+            return ndjson_export(get_reviews_collection(), {'ProductModelName': product_id})
+        reviews = find_page(get_reviews_collection(), {'ProductModelName': product_id})
         return jsonify(reviews), 200
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error fetching reviews for product {product_id}: {e}")
         return jsonify({'error': str(e)}), 500
 
+SAMPLE_REVIEW_TEXTS = [
+    "Great product! It works exactly as described.",
+    "I'm very satisfied with this purchase. It has made my home much smarter.",
+    "The installation was easy, and the product functions well.",
+    "Good value for money. I would recommend it to others.",
+    "It's okay, but I expected a bit more from it.",
+    "Excellent addition to my smart home setup!",
+    "The product quality is top-notch. Very impressed!",
+    "It has some minor issues, but overall it's a good product.",
+    "I love how it integrates with my other smart devices.",
+    "The customer support was great when I had questions about setup.",
+    "It's a bit pricey, but the features are worth it.",
+    "This has simplified my daily routines significantly.",
+    "The app could use some improvements, but the hardware is solid.",
+    "I've had it for a month now and it's working flawlessly.",
+    "It's not as user-friendly as I hoped, but it gets the job done.",
+    "The energy savings have been noticeable since installation.",
+    "I'm impressed with the build quality and design.",
+    "It's a good start for making your home smarter.",
+    "The voice control feature is my favorite part.",
+    "It's been reliable so far, no complaints!"
+]
+
+SAMPLE_REVIEW_ORDERS = [
+    {"user_name": "Charlie Davis", "street": "563 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60667", "products": ["Apple HomePod Mini", "Arlo Video Doorbell", "Yale Assure Lock", "LIFX Smart Bulb", "August Smart Lock"]},
+    {"user_name": "John Doe", "street": "322 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60612", "products": ["Eufy Security Doorbell"]},
+    {"user_name": "Charlie Davis", "street": "711 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60696", "products": ["Wyze Bulb", "LIFX Smart Bulb", "Arlo Video Doorbell"]},
+    {"user_name": "Bob Johnson", "street": "997 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60687", "products": ["Yale Assure Lock", "Honeywell T9", "Bose Home Speaker 500", "Ecobee SmartThermostat"]},
+    {"user_name": "John Doe", "street": "172 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60673", "products": ["TP-Link Kasa Bulb", "Google Nest Audio", "SimpliSafe Doorbell", "Ultraloq U-Bolt Pro", "Sonos One"]},
+    {"user_name": "Jane Smith", "street": "333 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60695", "products": ["Eufy Security Doorbell", "Bose Home Speaker 500", "TP-Link Kasa Bulb"]},
+    {"user_name": "Bob Johnson", "street": "519 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60658", "products": ["Google Nest Audio", "Yale Assure Lock", "August Smart Lock", "Bose Home Speaker 500"]},
+    {"user_name": "Bob Johnson", "street": "693 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60624", "products": ["SimpliSafe Doorbell", "Arlo Video Doorbell"]},
+    {"user_name": "Bob Johnson", "street": "652 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60649", "products": ["Emerson Sensi", "Sonos One", "Wyze Bulb"]},
+    {"user_name": "Alice Brown", "street": "446 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60635", "products": ["Yale Assure Lock", "Ecobee SmartThermostat", "LIFX Smart Bulb", "Philips Hue Bulb"]},
+    {"user_name": "Alice Brown", "street": "676 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60640", "products": ["Ecobee SmartThermostat", "Yale Assure Lock", "Bose Home Speaker 500", "Nanoleaf Light Panels", "Philips Hue Bulb"]},
+    {"user_name": "Alice Brown", "street": "923 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60666", "products": ["Nest Learning Thermostat", "Eufy Security Doorbell", "Nanoleaf Light Panels", "Arlo Video Doorbell", "Honeywell T9"]},
+    {"user_name": "John Doe", "street": "916 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60644", "products": ["Nest Learning Thermostat", "LIFX Smart Bulb"]},
+    {"user_name": "Jane Smith", "street": "104 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60626", "products": ["Google Nest Audio"]},
+    {"user_name": "Bob Johnson", "street": "860 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60624", "products": ["Ultraloq U-Bolt Pro", "Emerson Sensi", "Yale Assure Lock", "Google Nest Audio", "LIFX Smart Bulb"]},
+    {"user_name": "John Doe", "street": "909 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60686", "products": ["Nanoleaf Light Panels", "Arlo Video Doorbell", "Eufy Security Doorbell", "Philips Hue Bulb"]},
+    {"user_name": "John Doe", "street": "431 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60694", "products": ["Emerson Sensi", "Schlage Encode"]},
+    {"user_name": "Jane Smith", "street": "805 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60625", "products": ["Bose Home Speaker 500", "Ultraloq U-Bolt Pro", "Schlage Encode", "Arlo Video Doorbell"]},
+    {"user_name": "John Doe", "street": "362 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60619", "products": ["Apple HomePod Mini", "Nanoleaf Light Panels", "Nest Learning Thermostat"]},
+    {"user_name": "Jane Smith", "street": "420 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60638", "products": ["Ultraloq U-Bolt Pro", "Philips Hue Bulb", "LIFX Smart Bulb"]}
+]
+
+# Review documents shaped like the sample data: one per product of each sample
+# order by default, or `count` reviews drawn at random (from `product_names`
+# when given) for seeding larger databases
+def sample_reviews(count=None, product_names=None):
+    def random_date():
+        return datetime.now() - timedelta(days=random.randint(1, 30))
+
+    if count is None:
+        pairs = ((order, product) for order in SAMPLE_REVIEW_ORDERS for product in order['products'])
+    else:
+        pairs = ((order, random.choice(product_names or order['products']))
+                 for order in (random.choice(SAMPLE_REVIEW_ORDERS) for _ in range(count)))
+
+    for order, product in pairs:
+        yield {
+            "ProductModelName": product,
+            "ProductCategoryName": "Smart Home",  # You may want to map this more accurately
+            "StoreID": "online",  # Assuming online purchase
+            "StoreZip": order['zip_code'],
+            "StoreCity": order['city'],
+            "StoreState": order['state'],
+            "ProductOnSale": random.choice(["Yes", "No"]),
+            "ManufacturerName": product.split()[0],  # Using the first word of product name as manufacturer
+            "ManufacturerRebate": random.choice(["Yes", "No"]),
+            "UserID": order['user_name'].replace(" ", "").lower(),  # Creating a simple user ID
+            "UserAge": random.randint(18, 75),
+            "UserGender": random.choice(["Male", "Female", "Other"]),
+            "UserOccupation": random.choice(["Engineer", "Teacher", "Doctor", "Student", "Retired", "Business Owner"]),
+            "ReviewRating": random.randint(3, 5),  # Assuming mostly positive reviews
+            "ReviewDate": random_date(),
+            "ReviewText": random.choice(SAMPLE_REVIEW_TEXTS),
+            "DeliveryType": "pickup" if "pickup" in order else "delivery"
+        }
+
 def generate_sample_reviews():
     # Check if sample reviews have been generated before
-    flag = flags_collection.find_one({'name': 'sample_reviews_generated'})
+    flag = get_flags_collection().find_one({'name': 'sample_reviews_generated'})
     if flag and flag.get('value', False):
         print("Sample reviews have already been generated. Skipping generation.")
         return
 
-    review_texts = [
-        "Great product! It works exactly as described.",
-        "I'm very satisfied with this purchase. It has made my home much smarter.",
-        "The installation was easy, and the product functions well.",
-        "Good value for money. I would recommend it to others.",
-        "It's okay, but I expected a bit more from it.",
-        "Excellent addition to my smart home setup!",
-        "The product quality is top-notch. Very impressed!",
-        "It has some minor issues, but overall it's a good product.",
-        "I love how it integrates with my other smart devices.",
-        "The customer support was great when I had questions about setup.",
-        "It's a bit pricey, but the features are worth it.",
-        "This has simplified my daily routines significantly.",
-        "The app could use some improvements, but the hardware is solid.",
-        "I've had it for a month now and it's working flawlessly.",
-        "It's not as user-friendly as I hoped, but it gets the job done.",
-        "The energy savings have been noticeable since installation.",
-        "I'm impressed with the build quality and design.",
-        "It's a good start for making your home smarter.",
-        "The voice control feature is my favorite part.",
-        "It's been reliable so far, no complaints!"
-    ]
-
-    orders = [
-        {"user_name": "Charlie Davis", "street": "563 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60667", "products": ["Apple HomePod Mini", "Arlo Video Doorbell", "Yale Assure Lock", "LIFX Smart Bulb", "August Smart Lock"]},
-        {"user_name": "John Doe", "street": "322 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60612", "products": ["Eufy Security Doorbell"]},
-        {"user_name": "Charlie Davis", "street": "711 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60696", "products": ["Wyze Bulb", "LIFX Smart Bulb", "Arlo Video Doorbell"]},
-        {"user_name": "Bob Johnson", "street": "997 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60687", "products": ["Yale Assure Lock", "Honeywell T9", "Bose Home Speaker 500", "Ecobee SmartThermostat"]},
-        {"user_name": "John Doe", "street": "172 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60673", "products": ["TP-Link Kasa Bulb", "Google Nest Audio", "SimpliSafe Doorbell", "Ultraloq U-Bolt Pro", "Sonos One"]},
-        {"user_name": "Jane Smith", "street": "333 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60695", "products": ["Eufy Security Doorbell", "Bose Home Speaker 500", "TP-Link Kasa Bulb"]},
-        {"user_name": "Bob Johnson", "street": "519 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60658", "products": ["Google Nest Audio", "Yale Assure Lock", "August Smart Lock", "Bose Home Speaker 500"]},
-        {"user_name": "Bob Johnson", "street": "693 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60624", "products": ["SimpliSafe Doorbell", "Arlo Video Doorbell"]},
-        {"user_name": "Bob Johnson", "street": "652 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60649", "products": ["Emerson Sensi", "Sonos One", "Wyze Bulb"]},
-        {"user_name": "Alice Brown", "street": "446 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60635", "products": ["Yale Assure Lock", "Ecobee SmartThermostat", "LIFX Smart Bulb", "Philips Hue Bulb"]},
-        {"user_name": "Alice Brown", "street": "676 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60640", "products": ["Ecobee SmartThermostat", "Yale Assure Lock", "Bose Home Speaker 500", "Nanoleaf Light Panels", "Philips Hue Bulb"]},
-        {"user_name": "Alice Brown", "street": "923 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60666", "products": ["Nest Learning Thermostat", "Eufy Security Doorbell", "Nanoleaf Light Panels", "Arlo Video Doorbell", "Honeywell T9"]},
-        {"user_name": "John Doe", "street": "916 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60644", "products": ["Nest Learning Thermostat", "LIFX Smart Bulb"]},
-        {"user_name": "Jane Smith", "street": "104 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60626", "products": ["Google Nest Audio"]},
-        {"user_name": "Bob Johnson", "street": "860 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60624", "products": ["Ultraloq U-Bolt Pro", "Emerson Sensi", "Yale Assure Lock", "Google Nest Audio", "LIFX Smart Bulb"]},
-        {"user_name": "John Doe", "street": "909 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60686", "products": ["Nanoleaf Light Panels", "Arlo Video Doorbell", "Eufy Security Doorbell", "Philips Hue Bulb"]},
-        {"user_name": "John Doe", "street": "431 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60694", "products": ["Emerson Sensi", "Schlage Encode"]},
-        {"user_name": "Jane Smith", "street": "805 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60625", "products": ["Bose Home Speaker 500", "Ultraloq U-Bolt Pro", "Schlage Encode", "Arlo Video Doorbell"]},
-        {"user_name": "John Doe", "street": "362 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60619", "products": ["Apple HomePod Mini", "Nanoleaf Light Panels", "Nest Learning Thermostat"]},
-        {"user_name": "Jane Smith", "street": "420 Sample St", "city": "Chicago", "state": "IL", "zip_code": "60638", "products": ["Ultraloq U-Bolt Pro", "Philips Hue Bulb", "LIFX Smart Bulb"]}
-    ]
-
-    def random_date():
-        return datetime.now() - timedelta(days=random.randint(1, 30))
-
-    reviews_to_insert = []
-    for order in orders:
-        for product in order['products']:
-            review = {
-                "ProductModelName": product,
-                "ProductCategoryName": "Smart Home",  # You may want to map this more accurately
-                "StoreID": "online",  # Assuming online purchase
-                "StoreZip": order['zip_code'],
-                "StoreCity": order['city'],
-                "StoreState": order['state'],
-                "ProductOnSale": random.choice(["Yes", "No"]),
-                "ManufacturerName": product.split()[0],  # Using the first word of product name as manufacturer
-                "ManufacturerRebate": random.choice(["Yes", "No"]),
-                "UserID": order['user_name'].replace(" ", "").lower(),  # Creating a simple user ID
-                "UserAge": random.randint(18, 75),
-                "UserGender": random.choice(["Male", "Female", "Other"]),
-                "UserOccupation": random.choice(["Engineer", "Teacher", "Doctor", "Student", "Retired", "Business Owner"]),
-                "ReviewRating": random.randint(3, 5),  # Assuming mostly positive reviews
-                "ReviewDate": random_date(),
-                "ReviewText": random.choice(review_texts),
-                "DeliveryType": "pickup" if "pickup" in order else "delivery"
-            }
-            reviews_to_insert.append(review)
+    reviews_to_insert = list(sample_reviews())
 
     if reviews_to_insert:
-        reviews_collection.insert_many(reviews_to_insert)
+        get_reviews_collection().insert_many(reviews_to_insert)
+        record_review_stats(reviews_to_insert)
         print(f"Added {len(reviews_to_insert)} sample reviews to the database.")
         
         # Set the flag to indicate that sample reviews have been generated
-        flags_collection.update_one(
+        get_flags_collection().update_one(
             {'name': 'sample_reviews_generated'},
             {'$set': {'value': True}},
             upsert=True
@@ -161,5 +594,60 @@ def generate_sample_reviews():
     else:
         print("No sample reviews to add.")
 
-# Generate sample reviews when this module is imported
-generate_sample_reviews()
\ No newline at end of file
+# Index creation (and optional sample seeding) runs once per process: eagerly
+# from the 'full' boot, otherwise lazily before the first review request, so
+# importing this module never touches MongoDB.
+_reviews_ready = False
+_reviews_ready_lock = threading.Lock()
+
+def prepare_reviews_collection(seed=False):
+    global _reviews_ready
+    if _reviews_ready:
+        return
+    with _reviews_ready_lock:
+        if _reviews_ready:
+            return
+        ensure_review_indexes()
+        if seed:
+            generate_sample_reviews()
+        # One-time backfill for databases that have reviews but no stats yet
+        if get_review_stats_collection().estimated_document_count() == 0 and \
+                get_reviews_collection().estimated_document_count() > 0:
+            rebuild_review_stats()
+        _reviews_ready = True
+
+@mongo_bp.before_request
+def ensure_reviews_ready():
+    prepare_reviews_collection()
+
+def load_reviews_main(argv):
+    parser = argparse.ArgumentParser(description='Bulk load product reviews into MongoDB')
+    parser.add_argument('path', help="JSON array file (sample_reviews.json shape), NDJSON file, or '-' for NDJSON on stdin")
+    parser.add_argument('--batch-size', type=int, default=INGEST_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    prepare_reviews_collection()
+
+    source = sys.stdin if args.path == '-' else open(args.path, encoding='utf-8')
+    with source:
+        # A JSON array is loaded whole; anything else is streamed line by line
+        first_line = source.readline()
+        if first_line.lstrip().startswith('['):
+            documents = json.loads(first_line + source.read())
+        else:
+            documents = read_ndjson(itertools.chain([first_line], source))
+
+        started = time.perf_counter()
+        inserted = rejected = 0
+        for report in ingest_reviews(documents, args.batch_size):
+            inserted += report['inserted']
+            rejected += report['rejected']
+            print(f"batch {report['batch']}: {report['inserted']} inserted, {report['rejected']} rejected, "
+                  f"{report['docs_per_second']} docs/s")
+        elapsed = time.perf_counter() - started
+        print(f"Loaded {inserted} reviews ({rejected} rejected) in {elapsed:.2f}s")
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['load-reviews']:
+        load_reviews_main(sys.argv[2:])
+    elif sys.argv[1:2] == ['rebuild-review-stats']:
+        rebuild_review_stats()
@@ -0,0 +1,103 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import OrderedDict
+
+WHITESPACE = re.compile(r'\s+')
+
+def normalize(text):
+    return WHITESPACE.sub(' ', text.lower()).lstrip()
+
+def name_keys(name):
+    # One key per word start, so "smart" completes "August Smart Lock" as well as "Smart Plug"
+    words = normalize(name).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+# Type-ahead over product names, answered from memory.
+#
+# Names are kept in a sorted array of (key, product_id) with one key per word
+# start; a prefix is two bisects into that array. Matches are ranked by units
+# sold, then by name, and the top-k for recent prefixes are kept in
+# a small LRU that is dropped whenever names or scores change.
+class ProductAutocomplete:
+    def __init__(self, cache_size=512):
+        self.cache_size = cache_size
+        self.built_at = None
+        self._keys = []    # sorted (key, product_id)
+        self._names = {}   # product_id -> name
+        self._scores = {}  # product_id -> units sold
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rebuild(self, names, scores):
+        # names: {product_id: name}, scores: {product_id: units sold}
+        keys = sorted((key, product_id) for product_id, name in names.items() for key in name_keys(name))
+        with self._lock:
+            self._keys, self._names, self._scores = keys, dict(names), dict(scores)
+            self._cache.clear()
+            self.built_at = time.monotonic()
+
+    def upsert(self, product_id, name):
+        with self._lock:
+            self._remove(product_id)
+            for key in name_keys(name):
+                bisect.insort(self._keys, (key, product_id))
+            self._names[product_id] = name
+            self._cache.clear()
+
+    def invalidate(self):
+        # Forces a rebuild on the next lookup (bulk imports)
+        with self._lock:
+            self.built_at = None
+            self._cache.clear()
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+            self._scores.pop(product_id, None)
+            self._cache.clear()
+
+    def _remove(self, product_id):
+        name = self._names.pop(product_id, None)
+        if name is None:
+            return
+        for key in name_keys(name):
+            index = bisect.bisect_left(self._keys, (key, product_id))
+            if index < len(self._keys) and self._keys[index] == (key, product_id):
+                del self._keys[index]
+
+    def complete(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        cache_key = (prefix, limit)
+
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached
+
+            start = bisect.bisect_left(self._keys, (prefix,))
+            end = bisect.bisect_left(self._keys, (prefix + '\uffff',), start)
+            product_ids = {product_id for _, product_id in self._keys[start:end]}
+            ranked = heapq.nsmallest(limit, product_ids, key=lambda product_id: (
+                -self._scores.get(product_id, 0), self._names[product_id].lower()
+            ))
+            results = [{'id': product_id, 'name': self._names[product_id]} for product_id in ranked]
+
+            self._cache[cache_key] = results
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                'products': len(self._names),
+                'keys': len(self._keys),
+                'cached_prefixes': len(self._cache)
+            }
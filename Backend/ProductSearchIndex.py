@@ -0,0 +1,155 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import OrderedDict
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Relative weight of a term hit in each field, and of an exact vs prefix hit
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+PREFIX_FACTOR = 0.5
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+# In-process inverted index over product name and description, used by
+# /api/products/search instead of a leading-wildcard ILIKE scan.
+#
+# Every term in the query must match (AND). The last term is treated as a
+# prefix, so "smart th" finds "Smart Thermostat" while typing; prefixes are
+# resolved with bisect over the sorted vocabulary instead of scanning products.
+# Products are ranked by summed term weights (name hits over description hits,
+# exact over prefix), then by name. Ranked id lists for recent queries are kept
+# in a small LRU that is dropped whenever the index changes.
+class ProductSearchIndex:
+    def __init__(self, cache_size=512):
+        self.cache_size = cache_size
+        self.built_at = None
+        self._postings = {}    # token -> {product_id: weight}
+        self._vocabulary = []  # sorted tokens, for prefix lookups
+        self._names = {}       # product_id -> name
+        self._tokens = {}      # product_id -> tokens it was indexed under
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _weights(name, description):
+        weights = {}
+        for token in tokenize(description):
+            weights[token] = max(weights.get(token, 0), DESCRIPTION_WEIGHT)
+        for token in tokenize(name):
+            weights[token] = NAME_WEIGHT
+        return weights
+
+    def rebuild(self, rows):
+        # rows: iterable of (product_id, name, description). The new index is
+        # built aside and swapped in, so searches keep running meanwhile.
+        postings, names, tokens = {}, {}, {}
+        for product_id, name, description in rows:
+            weights = self._weights(name, description)
+            for token, weight in weights.items():
+                postings.setdefault(token, {})[product_id] = weight
+            names[product_id] = name or ''
+            tokens[product_id] = tuple(weights)
+        vocabulary = sorted(postings)
+
+        with self._lock:
+            self._postings, self._vocabulary = postings, vocabulary
+            self._names, self._tokens = names, tokens
+            self._cache.clear()
+            self.built_at = time.monotonic()
+
+    def upsert(self, product_id, name, description):
+        with self._lock:
+            self._remove(product_id)
+            weights = self._weights(name, description)
+            for token, weight in weights.items():
+                if token not in self._postings:
+                    self._postings[token] = {}
+                    bisect.insort(self._vocabulary, token)
+                self._postings[token][product_id] = weight
+            self._names[product_id] = name or ''
+            self._tokens[product_id] = tuple(weights)
+            self._cache.clear()
+
+    def invalidate(self):
+        # Forces a rebuild on the next search (bulk imports, other processes)
+        with self._lock:
+            self.built_at = None
+            self._cache.clear()
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+            self._cache.clear()
+
+    def _remove(self, product_id):
+        for token in self._tokens.pop(product_id, ()):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(product_id, None)
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        self._names.pop(product_id, None)
+
+    def _term_scores(self, term, prefix):
+        # product_id -> best weight for this term (exact token or, for the
+        # prefix term, any vocabulary token starting with it)
+        scores = dict(self._postings.get(term, {}))
+        if prefix:
+            # Tokens are [a-z0-9]+, so every token starting with `term` sorts before term + '{'
+            start = bisect.bisect_left(self._vocabulary, term)
+            end = bisect.bisect_left(self._vocabulary, term + '{', start)
+            for token in self._vocabulary[start:end]:
+                if token == term:
+                    continue
+                for product_id, weight in self._postings[token].items():
+                    weight *= PREFIX_FACTOR
+                    if weight > scores.get(product_id, 0):
+                        scores[product_id] = weight
+        return scores
+
+    def search(self, query, limit=10):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # A trailing space means the last word is complete
+        prefix = not query[-1:].isspace()
+        key = (tuple(terms), prefix, limit)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+            term_scores = [self._term_scores(term, prefix and i == len(terms) - 1)
+                           for i, term in enumerate(terms)]
+            term_scores.sort(key=len)
+            totals = term_scores[0]
+            for scores in term_scores[1:]:
+                totals = {product_id: total + scores[product_id]
+                          for product_id, total in totals.items() if product_id in scores}
+                if not totals:
+                    break
+
+            ranked = heapq.nsmallest(limit, totals, key=lambda product_id: (-totals[product_id], self._names[product_id]))
+
+            self._cache[key] = ranked
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return ranked
+
+    def stats(self):
+        with self._lock:
+            return {
+                'products': len(self._names),
+                'tokens': len(self._vocabulary),
+                'cached_queries': len(self._cache)
+            }
@@ -0,0 +1,168 @@
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Query-plan regression check for the hot read paths.
+#
+# Each case calls an endpoint through the Flask test client (or builds a query
+# directly), captures the SELECT statements it issues, and runs EXPLAIN on each
+# one with the same parameters. A full table scan fails the check, so a
+# dropped index or a non-sargable filter (e.g. func.date(col) = ...) shows up
+# before it reaches production.
+#
+#   python QueryPlanCheck.py                  # fresh seeded SQLite database in a temp dir
+#   DATABASE_URL=mysql://... python QueryPlanCheck.py [--seed]
+#
+# --seed drops and recreates the tables of DATABASE_URL and loads the sample
+# data; without it an existing, already seeded database is checked. MySQL may
+# still prefer a scan for tables with only a handful of rows, so check MySQL
+# against a realistically sized database. Exits 1 when a full scan is found.
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='queryplan-'), 'queryplan.db')
+    SEED_BY_DEFAULT = True
+else:
+    SEED_BY_DEFAULT = False
+
+from sqlalchemy import event
+
+from MySQLDataStoreUtilities import (
+    app, db, catalog_cache, initialize_product_data, daily_sales_query,
+    get_product_search, get_product_autocomplete, sales_analytics,
+    analytics_orders_query, analytics_lines_query, Order, Product
+)
+
+# Small lookup tables that may legitimately be scanned
+ALLOWED_SCANS = {'category', 'store_location'}
+
+
+def http_cases(sample):
+    user_name, confirmation_number, product_ids, cart_owner = sample
+    return [
+        ('order history', 'GET', f'/api/orderhistory/{user_name}', {}),
+        ('cancel order lookup', 'PUT', f'/api/orders/cancel/{confirmation_number}-missing', {}),
+        ('daily sales', 'GET', '/api/daily-sales', {}),
+        ('top zip codes', 'GET', '/api/trending/zip-codes', {}),
+        ('top sold products', 'GET', '/api/trending/sold-products', {}),
+        ('sales report', 'GET', '/api/sales', {}),
+        ('product details', 'GET', f'/api/products/{product_ids[0]}', {}),
+        ('product batch', 'GET', f'/api/products/batch?ids={",".join(product_ids[:5])}', {}),
+        ('product search', 'GET', '/api/products/search?query=smart', {}),
+        ('cart', 'GET', '/api/cart', {'X-User-Id': cart_owner}),
+    ]
+
+
+def query_cases():
+    today = datetime.utcnow().date()
+    cases = [
+        ('daily sales range (rollup rebuild)', lambda: daily_sales_query(today - timedelta(days=29), today)),
+    ]
+    if sales_analytics is not None:
+        cases += [
+            ('analytics order batch', lambda: analytics_orders_query(0)),
+            ('analytics line batch', lambda: analytics_lines_query(1, 1000)),
+        ]
+    return cases
+
+
+def explain(connection, statement, parameters):
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        plan = [row[-1] for row in rows]
+        scans = []
+        for detail in plan:
+            # "SCAN order" / "SCAN order USING INDEX ..." walk the whole table or index;
+            # "SEARCH ..." is an index lookup or range
+            match = re.match(r'SCAN (\w+)', detail)
+            if match and match.group(1) not in ALLOWED_SCANS and not detail.startswith('SCAN CONSTANT'):
+                scans.append(detail)
+        return plan, scans
+
+    result = connection.exec_driver_sql('EXPLAIN ' + statement, parameters)
+    columns = list(result.keys())
+    plan, scans = [], []
+    for row in result.all():
+        row = dict(zip(columns, row))
+        plan.append(f"{row.get('table')}: type={row.get('type')} key={row.get('key')} rows={row.get('rows')} {row.get('Extra') or ''}")
+        # ALL is a full table scan, index a full index scan
+        if row.get('type') in ('ALL', 'index') and row.get('table') not in ALLOWED_SCANS:
+            scans.append(plan[-1])
+    return plan, scans
+
+
+def capture_statements(run):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return statements
+
+
+def sample_data():
+    order = Order.query.order_by(Order.id).first()
+    product_ids = [product_id for (product_id,) in db.session.query(Product.id).order_by(Product.id).limit(5)]
+    if order is None or not product_ids:
+        raise SystemExit('The database has no orders or products; run with --seed')
+    return order.user_name, order.confirmation_number, product_ids, 'queryplan-check'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fail when a hot query does a full table scan')
+    parser.add_argument('--seed', action='store_true', default=SEED_BY_DEFAULT,
+                        help='Recreate the tables and load the sample data first')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan, not only failures')
+    args = parser.parse_args(argv)
+
+    failures = 0
+    with app.app_context():
+        if args.seed:
+            db.drop_all()
+            db.create_all()
+            initialize_product_data('ProductCatalog.xml')
+
+        # The in-memory search/autocomplete indexes read the whole product table
+        # once when built; that is not a per-request scan
+        get_product_search()
+        get_product_autocomplete()
+
+        cases = []
+        client = app.test_client()
+        for name, method, path, headers in http_cases(sample_data()):
+            cases.append((name, lambda method=method, path=path, headers=headers:
+                          client.open(path, method=method, headers=headers)))
+        for name, build_query in query_cases():
+            cases.append((name, lambda build_query=build_query: build_query().all()))
+
+        for name, run in cases:
+            catalog_cache.bump()  # Cached endpoints must hit the database
+            statements = capture_statements(run)
+            db.session.rollback()
+            case_failed = False
+            with db.engine.connect() as connection:
+                for statement, parameters in statements:
+                    plan, scans = explain(connection, statement, parameters)
+                    if scans:
+                        case_failed = True
+                    if scans or args.verbose:
+                        print(f"  {' '.join(statement.split())[:160]}")
+                        for line in plan:
+                            print(f"    {'FULL SCAN ' if line in scans else ''}{line}")
+            failures += case_failed
+            print(f"{'FAIL' if case_failed else 'ok  '} {name} ({len(statements)} queries)")
+
+    print(f"{failures} of {len(cases)} cases do a full scan" if failures else f"All {len(cases)} cases use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,387 @@
+import threading
+import time
+
+import numpy as np
+
+ORDER_DIMENSIONS = ('zip_code', 'city', 'state', 'delivery_option', 'pickup_location', 'status')
+LINE_DIMENSIONS = ('product_id',)
+DIMENSIONS = ORDER_DIMENSIONS + LINE_DIMENSIONS
+METRICS = ('orders', 'sales', 'units', 'avg_order_value')
+BUCKETS = ('day', 'week', 'month', 'year')
+
+# Row shapes accepted by rebuild()/update(): order tuples in ORDER_COLUMNS order,
+# line tuples in LINE_COLUMNS order
+ORDER_COLUMNS = ('id', 'order_date') + ORDER_DIMENSIONS + ('total_amount',)
+LINE_COLUMNS = ('order_id', 'product_id', 'quantity', 'unit_price')
+
+MAX_LIMIT = 1000
+# Group key spaces up to this size are grouped with a bincount instead of a sort
+DENSE_GROUP_SPACE = 1 << 22
+
+
+def to_days(dates):
+    # datetime/date (or None) -> days since 1970-01-01; None becomes the smallest int64
+    return np.array(dates, dtype='datetime64[D]').astype(np.int64)
+
+def parse_day(value):
+    # 'YYYY-MM-DD' (or a date) -> days since 1970-01-01
+    try:
+        return int(np.datetime64(value, 'D').astype(np.int64))
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+
+def bucket_days(days, bucket):
+    # Start of the bucket each day falls in, in the bucket's own unit
+    if bucket == 'day':
+        return days
+    if bucket == 'week':
+        return (days + 3) // 7 * 7 - 3  # Weeks start on Monday; 1970-01-01 was a Thursday
+    unit = 'M' if bucket == 'month' else 'Y'
+    return days.astype('datetime64[D]').astype(f'datetime64[{unit}]').astype(np.int64)
+
+def bucket_labels(values, bucket):
+    unit = {'day': 'D', 'week': 'D', 'month': 'M', 'year': 'Y'}[bucket]
+    return np.datetime_as_string(values.astype(f'datetime64[{unit}]')).tolist()
+
+
+class _Dictionary:
+    # Categorical codes for one string column; codes are never reused, so
+    # appending rows never re-encodes existing ones
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, values):
+        codes = self.codes
+        encoded = np.empty(len(values), np.int32)
+        for position, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self.values)
+                self.values.append(value)
+            encoded[position] = code
+        return encoded
+
+    def lookup(self, values):
+        return np.array([self.codes[value] for value in values if value in self.codes], np.int32)
+
+
+class _Table:
+    # Column arrays with spare capacity, so appends are amortized O(1)
+    def __init__(self, dtypes):
+        self.size = 0
+        self.columns = {name: np.zeros(0, dtype) for name, dtype in dtypes.items()}
+
+    def append(self, values):
+        count = len(next(iter(values.values())))
+        needed = self.size + count
+        capacity = len(next(iter(self.columns.values())))
+        if needed > capacity:
+            capacity = max(needed, capacity * 2, 1024)
+            for name, column in self.columns.items():
+                grown = np.zeros(capacity, column.dtype)
+                grown[:self.size] = column[:self.size]
+                self.columns[name] = grown
+        for name, column in values.items():
+            self.columns[name][self.size:needed] = column
+        start, self.size = self.size, needed
+        return start
+
+    def __getitem__(self, name):
+        return self.columns[name][:self.size]
+
+
+class _State:
+    def __init__(self):
+        self.orders = _Table(dict(
+            id=np.int64, day=np.int64, total=np.float64, units=np.int64, live=np.bool_,
+            **{dimension: np.int32 for dimension in ORDER_DIMENSIONS}
+        ))
+        self.lines = _Table(dict(order=np.int64, product_id=np.int32, quantity=np.int64, sales=np.float64, live=np.bool_))
+        self.dictionaries = {dimension: _Dictionary() for dimension in DIMENSIONS}
+        self.positions = {}  # order id -> row in self.orders
+        self.max_order_id = 0
+
+    def drop(self, order_ids):
+        # Marks orders and their lines dead; they stay as tombstones until the
+        # next rebuild(), or come back to life when apply() replaces them
+        rows = [self.positions[order_id] for order_id in order_ids if order_id in self.positions]
+        if rows:
+            rows = np.array(rows, np.int64)
+            self.orders['live'][rows] = False
+            self.orders['units'][rows] = 0
+            self.lines['live'][np.isin(self.lines['order'], rows)] = False
+
+    def apply(self, orders, lines, replace=()):
+        # Adds new orders with their lines. Orders already loaded are skipped, so
+        # re-reading an id range is a no-op, unless they are in `replace` (dropped
+        # first), in which case they are overwritten in place.
+        orders = [order for order in orders if order[0] in replace or order[0] not in self.positions]
+        lines = [line for line in lines if line[0] in replace or line[0] not in self.positions]
+        order_ids = [order[0] for order in orders]
+
+        if orders:
+            columns = list(zip(*orders))
+            values = {
+                'id': np.array(columns[0], np.int64),
+                'day': to_days(columns[1]),
+                'total': np.array([total or 0 for total in columns[-1]], np.float64),
+                'units': np.zeros(len(orders), np.int64),
+                'live': np.ones(len(orders), np.bool_)
+            }
+            for offset, dimension in enumerate(ORDER_DIMENSIONS, start=2):
+                values[dimension] = self.dictionaries[dimension].encode(columns[offset])
+
+            existing = np.array([order_id in self.positions for order_id in order_ids], np.bool_)
+            if existing.any():
+                rows = np.array([self.positions[order_id] for order_id in np.array(order_ids)[existing]], np.int64)
+                for name, column in values.items():
+                    self.orders.columns[name][rows] = column[existing]
+            if not existing.all():
+                new = ~existing
+                start = self.orders.append({name: column[new] for name, column in values.items()})
+                for offset, order_id in enumerate(np.array(order_ids)[new].tolist()):
+                    self.positions[order_id] = start + offset
+            self.max_order_id = max(self.max_order_id, max(order_ids))
+
+        lines = [line for line in lines if line[0] in self.positions]  # Lines of orders loaded above
+        if lines:
+            order_ids, product_ids, quantities, unit_prices = zip(*lines)
+            rows = np.array([self.positions[order_id] for order_id in order_ids], np.int64)
+            quantities = np.array(quantities, np.int64)
+            by_order = np.argsort(rows, kind='stable')  # Keeps each order's lines together (see _query)
+            self.lines.append({
+                'order': rows[by_order],
+                'product_id': self.dictionaries['product_id'].encode(product_ids)[by_order],
+                'quantity': quantities[by_order],
+                'sales': (quantities * np.array([price or 0 for price in unit_prices], np.float64))[by_order],
+                'live': np.ones(len(lines), np.bool_)
+            })
+            np.add.at(self.orders.columns['units'], rows, quantities)
+
+
+# Columnar, in-memory copy of orders and order lines for ad-hoc sales slices.
+#
+# Every order dimension is a categorical code column, order dates are int days
+# and the measures are plain numeric columns, so a query is a boolean mask, one
+# np.unique over the combined group codes and a bincount per metric. Queries
+# that group or filter by product run over the order-line table (sales are then
+# line revenue, quantity * unit_price); all others run over the order table
+# (sales are order totals). Cancelled orders are excluded unless asked for.
+#
+# rebuild() replaces everything with a state built aside; update() applies new
+# and changed orders in place. Loading rows from the database is up to the caller.
+class SalesAnalytics:
+    def __init__(self):
+        self.built_at = None       # time.monotonic() of the last rebuild or update
+        self.rebuilt_at = None     # time.monotonic() of the last full rebuild
+        self.refreshed_at = None   # time.time() of the last rebuild or update, for responses
+        self._state = _State()
+        self._changed = set()
+        self._lock = threading.Lock()  # Guards the state between update() and query()
+
+    @property
+    def max_order_id(self):
+        return self._state.max_order_id
+
+    def mark_changed(self, order_id):
+        # An order was updated, cancelled or deleted; reloaded by the next update()
+        with self._lock:
+            self._changed.add(order_id)
+
+    def take_changed(self):
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def rebuild(self, chunks):
+        # chunks: iterable of (order rows, line rows), read while queries keep
+        # using the current state
+        state = _State()
+        for orders, lines in chunks:
+            state.apply(orders, lines)
+        with self._lock:
+            self._state = state
+            self.rebuilt_at = self.built_at = time.monotonic()
+            self.refreshed_at = time.time()
+
+    def update(self, chunks, reloaded_ids=()):
+        # reloaded_ids: orders that changed since they were loaded; those missing
+        # from the chunks were deleted
+        chunks = list(chunks)  # Read from the database before taking the lock
+        reloaded_ids = set(reloaded_ids)
+        with self._lock:
+            self._state.drop(reloaded_ids)
+            for orders, lines in chunks:
+                self._state.apply(orders, lines, reloaded_ids)
+            self.built_at = time.monotonic()
+            self.refreshed_at = time.time()
+
+    def query(self, group_by=(), metrics=('orders', 'sales'), bucket=None, start=None, end=None,
+              filters=None, include_cancelled=False, sort=None, limit=100):
+        group_by, metrics, filters = list(group_by), list(metrics), dict(filters or {})
+        for dimension in group_by + list(filters):
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{dimension}'; use one of {', '.join(DIMENSIONS)}")
+        for metric in metrics:
+            if metric not in METRICS:
+                raise ValueError(f"Unknown metric '{metric}'; use one of {', '.join(METRICS)}")
+        if not metrics:
+            raise ValueError('At least one metric is required')
+        if bucket is not None and bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket '{bucket}'; use one of {', '.join(BUCKETS)}")
+        if sort is not None:
+            # period only exists as a group when there is a bucket
+            sortable = list(METRICS) + group_by + (['period'] if bucket else [])
+            if not isinstance(sort, str) or sort.lstrip('-') not in sortable:
+                raise ValueError(f"Cannot sort by '{sort}'; use one of {', '.join(sortable)}, optionally prefixed with '-'")
+        limit = min(max(int(limit), 1), MAX_LIMIT)
+        start = parse_day(start) if start else None
+        end = parse_day(end) if end else None
+
+        with self._lock:
+            return self._query(self._state, group_by, metrics, bucket, start, end, filters, include_cancelled, sort, limit)
+
+    def _query(self, state, group_by, metrics, bucket, start, end, filters, include_cancelled, sort, limit):
+        orders, lines = state.orders, state.lines
+        by_line = any(dimension in LINE_DIMENSIONS for dimension in group_by + list(filters))
+
+        def matches(dimension, codes):
+            # Code -> bool lookup table; cheaper than np.isin for a few wanted values
+            wanted = filters[dimension]
+            wanted = wanted if isinstance(wanted, (list, tuple)) else [wanted]
+            table = np.zeros(len(state.dictionaries[dimension].values) + 1, np.bool_)
+            table[state.dictionaries[dimension].lookup(wanted)] = True
+            return table[codes]
+
+        # Order-level filters run on the order table; a product query then maps
+        # them onto its lines with one gather
+        mask = orders['live'].copy()
+        days = orders['day']
+        if start is not None:
+            mask &= days >= start
+        if end is not None:
+            mask &= days <= end
+        for dimension in filters:
+            if dimension in ORDER_DIMENSIONS:
+                mask &= matches(dimension, orders[dimension])
+        if not include_cancelled and 'status' not in filters and 'Cancelled' in state.dictionaries['status'].codes:
+            mask &= orders['status'] != state.dictionaries['status'].codes['Cancelled']
+
+        if by_line:
+            mask = lines['live'] & mask[lines['order']]
+            for dimension in filters:
+                if dimension in LINE_DIMENSIONS:
+                    mask &= matches(dimension, lines[dimension])
+            rows = np.flatnonzero(mask)
+            order_rows = lines['order'][rows]
+            column = lambda name: lines[name][rows] if name in LINE_DIMENSIONS else orders[name][order_rows]
+        else:
+            rows = order_rows = np.flatnonzero(mask)
+            column = lambda name: orders[name][rows]
+
+        keys = [column(dimension) for dimension in group_by]
+        if bucket:
+            keys.append(bucket_days(column('day'), bucket))
+        matched = len(rows)
+
+        if keys:
+            groups, inverse = self._group(keys)
+            group_count = len(groups[0])
+        else:
+            groups, inverse, group_count = [], np.zeros(matched, np.int64), 1 if matched else 0
+
+        sort = sort or ('period' if bucket else '-' + metrics[0])
+        needed = set(metrics) | {sort.lstrip('-')}
+        if 'avg_order_value' in needed:
+            needed |= {'orders', 'sales'}
+
+        table = lines if by_line else orders
+        values = {}
+        if 'orders' in needed:
+            if by_line:
+                # Distinct orders per group. Lines are stored grouped by order, so
+                # the order-major (order, group) key is nearly sorted and the stable
+                # sort is close to linear; duplicates are then adjacent.
+                pairs = order_rows * max(group_count, 1) + inverse
+                pairs.sort(kind='stable')
+                distinct = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))] if len(pairs) else pairs
+                values['orders'] = np.bincount(distinct % max(group_count, 1), minlength=group_count)
+            else:
+                values['orders'] = np.bincount(inverse, minlength=group_count)
+        if 'sales' in needed:
+            values['sales'] = np.bincount(inverse, weights=table['sales' if by_line else 'total'][rows], minlength=group_count)
+        if 'units' in needed:
+            weights = table['quantity' if by_line else 'units'][rows]
+            values['units'] = np.bincount(inverse, weights=weights, minlength=group_count).astype(np.int64)
+        if 'avg_order_value' in needed:
+            values['avg_order_value'] = np.divide(values['sales'], values['orders'], out=np.zeros(group_count),
+                                                  where=values['orders'] > 0)
+        order = self._sort(sort, values, group_by, groups, state, group_count)[:limit]
+
+        # Labels only for the rows returned
+        labels = {}
+        for position, dimension in enumerate(group_by):
+            dictionary = state.dictionaries[dimension].values
+            labels[dimension] = [dictionary[code] for code in groups[position][order].tolist()]
+        if bucket:
+            labels['period'] = bucket_labels(groups[-1][order], bucket)
+        rows = []
+        for position, index in enumerate(order.tolist()):
+            row = {name: labels[name][position] for name in labels}
+            for metric in metrics:
+                value = values[metric][index].item()
+                row[metric] = round(value, 2) if isinstance(value, float) else value
+            rows.append(row)
+        return {'rows': rows, 'groups': group_count, 'matched': matched}
+
+    @staticmethod
+    def _group(keys):
+        # Group ids 0..n-1 for each row, and the key values of each group. The
+        # key columns are combined into one code; when that key space is small
+        # (the usual case for codes and buckets) groups are found with a bincount
+        # over it, otherwise with np.unique.
+        offsets = [int(key.min()) if len(key) else 0 for key in keys]
+        shifted = [(key - offset).astype(np.int64) for key, offset in zip(keys, offsets)]
+        sizes = [int(key.max()) + 1 if len(key) else 1 for key in shifted]
+        space = np.prod(sizes, dtype=np.float64)
+        if space >= 2 ** 62:
+            unique, inverse = np.unique(np.stack(shifted, axis=1), axis=0, return_inverse=True)
+            return [group + offset for group, offset in zip(unique.T, offsets)], inverse.reshape(-1)
+
+        combined = np.ravel_multi_index(shifted, sizes) if len(keys) > 1 else shifted[0]
+        if space <= max(4 * len(combined), DENSE_GROUP_SPACE):
+            present = np.flatnonzero(np.bincount(combined, minlength=int(space)))
+            remap = np.empty(int(space), np.int64)
+            remap[present] = np.arange(len(present))
+            unique, inverse = present, remap[combined]
+        else:
+            unique, inverse = np.unique(combined, return_inverse=True)
+        groups = np.unravel_index(unique, sizes) if len(keys) > 1 else (unique,)
+        return [group + offset for group, offset in zip(groups, offsets)], inverse.reshape(-1)
+
+    @staticmethod
+    def _sort(sort, values, group_by, groups, state, group_count):
+        descending = sort.startswith('-')
+        name = sort.lstrip('-')
+        if name in values or name == 'period':
+            key = values[name] if name in values else groups[-1]  # query() allows period only with a bucket
+            return np.argsort(-key if descending else key, kind='stable')
+        if name in group_by:
+            # Sorted by label for every group; missing values go last
+            dictionary = state.dictionaries[name].values
+            codes = groups[group_by.index(name)].tolist()
+            order = sorted(range(group_count), key=lambda index: (dictionary[codes[index]] is None, dictionary[codes[index]] or ''),
+                           reverse=descending)
+            return np.array(order, np.int64)
+        raise ValueError(f"Cannot sort by '{name}'; use a metric or a grouped dimension")
+
+    def stats(self):
+        with self._lock:
+            state = self._state
+            return {
+                'orders': int(state.orders['live'].sum()),
+                'lines': int(state.lines['live'].sum()),
+                'tombstones': int(state.orders.size - state.orders['live'].sum() + state.lines.size - state.lines['live'].sum()),
+                'max_order_id': state.max_order_id
+            }
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+
+# Precomputed trending lists, served from memory.
+#
+# `sections` maps a name to a function returning that list. A background thread
+# recomputes all of them every `refresh_interval` seconds, and `debounce`
+# seconds after mark_dirty() (so a burst of orders costs one recompute). get()
+# never blocks on the database unless the snapshot is missing or older than
+# `max_age`, which bounds staleness when the background refresh falls behind
+# or keeps failing. A section whose function raises keeps its previous value.
+class TrendingSnapshot:
+    def __init__(self, sections, refresh_interval=60, max_age=300, debounce=1.0, context=None, retry_delay=1.0):
+        self.sections = sections
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.debounce = debounce
+        self.context = context  # e.g. app.app_context, entered around every refresh
+        self.retry_delay = retry_delay
+        self.refreshes = 0
+        self.failures = 0
+        # (section -> list, section -> time.time() of its last successful compute),
+        # replaced as a whole so readers never see a half-updated pair
+        self._state = ({}, {})
+        self._attempted_at = None
+        self._dirty = threading.Event()
+        self._lock = threading.Lock()  # One refresh at a time
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+
+    def _compute(self):
+        data, updated_at = (dict(part) for part in self._state)
+        for name, compute in self.sections.items():
+            try:
+                data[name] = compute()
+                updated_at[name] = time.time()
+            except Exception as e:
+                self.failures += 1
+                print(f"Error refreshing trending {name}: {e}")
+        return data, updated_at
+
+    def refresh(self):
+        with self._lock:
+            self._attempted_at = time.monotonic()
+            if self.context is not None:
+                with self.context():
+                    data, updated_at = self._compute()
+            else:
+                data, updated_at = self._compute()
+            self._state = (data, updated_at)
+            self.refreshes += 1
+
+    def age(self, updated_at=None):
+        # Seconds since the oldest section was computed; None until every section has been
+        updated_at = self._state[1] if updated_at is None else updated_at
+        if len(updated_at) < len(self.sections):
+            return None
+        return max(time.time() - min(updated_at.values()), 0)
+
+    def get(self):
+        self._ensure_thread()
+        age = self.age()
+        if age is None or age > self.max_age:
+            # Missing or too stale: refresh inline. Waiting requests reuse the
+            # result, and a failing database is retried at most every retry_delay.
+            with self._lock:
+                retry = self._attempted_at is None or time.monotonic() - self._attempted_at >= self.retry_delay
+            age = self.age()
+            if (age is None or age > self.max_age) and retry:
+                self.refresh()
+        return self.snapshot()
+
+    def snapshot(self):
+        data, updated_at = self._state
+        age = self.age(updated_at)
+        snapshot = {name: data.get(name, []) for name in self.sections}
+        # Time of the oldest section, so a client sees the worst-case staleness
+        snapshot['generated_at'] = (
+            datetime.utcfromtimestamp(min(updated_at.values())).strftime('%Y-%m-%dT%H:%M:%SZ')
+            if age is not None else None
+        )
+        snapshot['age_seconds'] = round(age, 3) if age is not None else None
+        snapshot['stale'] = age is None or age > self.max_age
+        return snapshot
+
+    def mark_dirty(self):
+        self._ensure_thread()
+        self._dirty.set()
+
+    def _ensure_thread(self):
+        # One refresher per process; threads do not survive a fork
+        if self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread_pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='trending-refresh', daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            if self._dirty.wait(self.refresh_interval):
+                time.sleep(self.debounce)
+            self._dirty.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing trending snapshot: {e}")
+
+    def stats(self):
+        return {
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'age_seconds': self.age()
+        }
@@ -0,0 +1,214 @@
+import atexit
+import collections
+import glob
+import os
+import queue
+import threading
+import time
+
+from bson import json_util
+
+try:
+    import fcntl
+except ImportError:  # Windows: spool files are not locked, run a single process
+    fcntl = None
+
+_WAKE = object()
+
+# Write-behind buffer: put() only enqueues, and a background thread hands the
+# documents to `write(batch)` once `batch_size` have queued up or
+# `flush_interval` seconds after the first one arrived, whichever comes first.
+#
+# The queue is bounded. When it stays full for the put() timeout, put() raises
+# queue.Full so the caller can push back (e.g. answer 503) instead of buffering
+# without limit. A failed write is retried with backoff; the queue keeps
+# absorbing new documents until it fills up.
+#
+# With `spool_dir`, every document is also appended to a per-process spool file
+# before put() returns, in queue order, so the documents written so far are
+# always a prefix of the file. After every batch the file is truncated if nothing
+# is left queued; otherwise, once the written prefix reaches `spool_compact_bytes`,
+# it is rewritten with just the unwritten tail, so it stays bounded under steady
+# traffic. Spool files left behind by processes that died are replayed by the
+# writer thread before it takes new documents (put() never waits for it), so
+# writes must be idempotent (e.g. documents carry their own _id and duplicate-key
+# errors are ignored). close() drains the queue; it runs at exit.
+class WriteBehindQueue:
+    def __init__(self, write, max_size=10000, batch_size=500, flush_interval=0.2,
+                 spool_dir=None, name='queue', shutdown_timeout=10, spool_compact_bytes=1 << 20):
+        self.write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.shutdown_timeout = shutdown_timeout
+        self.spool_compact_bytes = spool_compact_bytes
+        self.name = name
+        self.flushed = 0
+        self.batches = 0
+        self.failed_attempts = 0
+        self._queue = queue.Queue()
+        # Free places in the queue. put() waits for one here rather than in a
+        # bounded Queue so it never blocks while holding the spool lock
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()  # Serializes spool appends and compaction
+        self._stopping = threading.Event()
+        self._spool = None
+        self._spool_dir = spool_dir
+        self._spooled = collections.deque()  # Size in bytes of each spool line not written yet
+        self._written_bytes = 0  # Length of the spool prefix whose documents were written
+
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+            # The start time keeps a reused pid from appending to a dead process's spool
+            self._spool_path = os.path.join(spool_dir, f'{name}-{os.getpid()}-{time.time_ns()}.ndjson')
+            self._spool = self._open_spool(self._spool_path)
+
+        self._thread = threading.Thread(target=self._run, name=f'{name}-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, document, timeout=None):
+        if self._stopping.is_set():
+            raise queue.Full
+        if not self._slots.acquire(timeout=timeout):
+            raise queue.Full
+        if not self._spool:
+            self._queue.put(document)
+            return
+        line = (json_util.dumps(document) + '\n').encode('utf-8')
+        with self._lock:
+            # Enqueued and spooled together so the spool keeps the queue's order
+            self._queue.put(document)
+            if not self._spool.closed:  # Otherwise close() already drained the queue
+                self._spool.write(line)
+                self._spool.flush()
+                self._spooled.append(len(line))
+
+    @staticmethod
+    def _open_spool(path):
+        spool = open(path, 'ab')
+        if fcntl:
+            fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)  # Marks the spool as live
+        return spool
+
+    def _take_batch(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if self._stopping.is_set():
+                timeout = 0  # Draining: take what is there without waiting
+            elif deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            try:
+                document = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if document is _WAKE:
+                continue
+            self._slots.release()
+            batch.append(document)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _write_with_retry(self, batch):
+        delay = self.flush_interval
+        while True:
+            try:
+                self.write(batch)
+                break
+            except Exception as e:
+                self.failed_attempts += 1
+                print(f"Error writing {len(batch)} queued documents ({self.name}): {e}")
+                if self._stopping.is_set():
+                    return False  # Still in the spool file, if there is one
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+        self.flushed += len(batch)
+        self.batches += 1
+        return True
+
+    def _compact_spool(self, written):
+        # The `written` documents just stored are the oldest lines in the spool
+        with self._lock:
+            if self._spool.closed:
+                return
+            for _ in range(written):
+                self._written_bytes += self._spooled.popleft()
+            if not self._spooled:
+                self._spool.truncate(0)
+                self._written_bytes = 0
+            elif self._written_bytes >= self.spool_compact_bytes:
+                with open(self._spool_path, 'rb') as current:
+                    current.seek(self._written_bytes)
+                    tail = current.read()
+                # The new file is locked before it replaces the old one, and is not
+                # named like a spool until then, so a replay never picks it up
+                spool = self._open_spool(self._spool_path + '.compacting')
+                spool.write(tail)
+                spool.flush()
+                os.replace(self._spool_path + '.compacting', self._spool_path)
+                self._spool.close()
+                self._spool = spool
+                self._written_bytes = 0
+
+    def _run(self):
+        if self._spool_dir:
+            self._replay_orphaned_spools(self._spool_dir)
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._take_batch()
+            if batch and self._write_with_retry(batch) and self._spool:
+                self._compact_spool(len(batch))
+
+    def _replay_orphaned_spools(self, spool_dir):
+        for path in glob.glob(os.path.join(spool_dir, f'{self.name}-*.ndjson')):
+            if path == self._spool_path:
+                continue
+            try:
+                spool = open(path, 'r+', encoding='utf-8')
+            except FileNotFoundError:
+                continue  # Replayed by another process meanwhile
+            with spool:
+                if fcntl:
+                    try:
+                        fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # Owned by a live process
+                    try:
+                        if os.stat(path).st_ino != os.fstat(spool.fileno()).st_ino:
+                            continue  # Replaced by its owner's compaction while we opened it
+                    except FileNotFoundError:
+                        continue
+                documents = [json_util.loads(line) for line in spool if line.strip()]
+                try:
+                    for start in range(0, len(documents), self.batch_size):
+                        self.write(documents[start:start + self.batch_size])
+                except Exception as e:
+                    print(f"Error replaying {path}: {e}")
+                    continue
+            os.remove(path)
+            print(f"Replayed {len(documents)} spooled documents from {path}")
+
+    def close(self):
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._queue.put(_WAKE)  # Cut short a batch that is waiting for more documents
+        self._thread.join(self.shutdown_timeout)
+        if self._spool:
+            drained = self._queue.empty() and not self._thread.is_alive()
+            with self._lock:
+                self._spool.close()
+            if drained and os.path.getsize(self._spool_path) == 0:
+                os.remove(self._spool_path)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'flushed': self.flushed,
+            'batches': self.batches,
+            'failed_attempts': self.failed_attempts
+        }
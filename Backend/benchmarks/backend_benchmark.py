@@ -0,0 +1,496 @@
+import argparse
+import inspect
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from urllib.parse import quote
+
+# End-to-end load test of every /api/* route.
+#
+# Boots the backend in-process on a threaded werkzeug server, seeds it at the
+# requested scale, replays each scenario with loadgen and reports throughput,
+# p50/p95/p99 and the SQL statements / Mongo commands issued per request.
+# From the Backend folder:
+#
+#   python benchmarks/backend_benchmark.py --output before.json     # temp SQLite + mongomock
+#   python benchmarks/backend_benchmark.py --orders 20000 --reviews 20000 --compare before.json
+#   DATABASE_URL=mysql://... MONGO_URI=mongodb://localhost:27017/ \
+#       python benchmarks/backend_benchmark.py --seed --products 2000 --orders 100000
+#
+# Without DATABASE_URL a throwaway SQLite database is created and seeded. An
+# explicit DATABASE_URL is dropped and reseeded only with --seed; without it an
+# already seeded database is benchmarked (and modified by the write scenarios).
+# Without MONGO_URI reviews live in mongomock (pip install mongomock); otherwise
+# in MONGO_DB_NAME, which defaults to smarthomes_benchmark here. ProductCatalog.xml
+# is never written: product add/update/delete go to a temp copy.
+#
+# Read scenarios run first (after a warm-up), then writes, then the ones that
+# consume rows (cancel, delete, remove), which get one prepared target per request.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_XML = os.path.join(BACKEND_DIR, 'ProductCatalog.xml')
+WORK_DIR = tempfile.mkdtemp(prefix='backend-benchmark-')
+sys.path.insert(0, BACKEND_DIR)
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORK_DIR, 'benchmark.db')
+    SEED_BY_DEFAULT = True
+else:
+    SEED_BY_DEFAULT = False
+USE_MONGOMOCK = not os.environ.get('MONGO_URI')
+os.environ.setdefault('MONGO_DB_NAME', 'smarthomes_benchmark')
+
+from flask import has_request_context
+from pymongo import monitoring
+from sqlalchemy import event
+
+from loadgen import run_load
+
+
+class QueryCounter:
+    # Counts only work done on request threads, so background refreshes
+    # (trending snapshot, analytics, write-behind) are not charged to a route
+    def __init__(self):
+        self.sql = 0
+        self.mongo = 0
+        self._lock = threading.Lock()
+
+    def count_sql(self, *args):
+        if has_request_context():
+            with self._lock:
+                self.sql += 1
+
+    def count_mongo(self, *args):
+        if has_request_context():
+            with self._lock:
+                self.mongo += 1
+
+    def snapshot(self):
+        return self.sql, self.mongo
+
+
+counter = QueryCounter()
+
+if USE_MONGOMOCK:
+    import mongomock
+    import mongomock.collection
+
+    # pymongo 4.9+ passes sort= to these; older mongomock does not accept it
+    for name in ('add_update', 'add_replace'):
+        method = getattr(mongomock.collection.BulkOperationBuilder, name)
+        if 'sort' not in inspect.signature(method).parameters:
+            def without_sort(self, *args, _method=method, **kwargs):
+                kwargs.pop('sort', None)
+                return _method(self, *args, **kwargs)
+            setattr(mongomock.collection.BulkOperationBuilder, name, without_sort)
+
+    # One call ~ one command sent to a real server
+    for name in ('find', 'find_one', 'insert_one', 'insert_many', 'update_one', 'update_many',
+                 'delete_one', 'delete_many', 'bulk_write', 'aggregate', 'count_documents',
+                 'estimated_document_count', 'create_indexes', 'find_one_and_update'):
+        def counted(self, *args, _method=getattr(mongomock.collection.Collection, name), **kwargs):
+            counter.count_mongo()
+            return _method(self, *args, **kwargs)
+        setattr(mongomock.collection.Collection, name, counted)
+else:
+    class MongoCommandCounter(monitoring.CommandListener):
+        # started() runs on the thread that issued the command
+        def started(self, event):
+            counter.count_mongo()
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    monitoring.register(MongoCommandCounter())
+
+import MongoDBDataStoreUtilities
+if USE_MONGOMOCK:
+    MongoDBDataStoreUtilities.MongoClient = mongomock.MongoClient
+from MongoDBDataStoreUtilities import (
+    prepare_reviews_collection, insert_reviews, sample_reviews,
+    get_reviews_collection, get_flags_collection, get_review_stats_collection
+)
+from MySQLDataStoreUtilities import (
+    app, db, catalog_cache, catalog_xml, initialize_product_data, read_products_from_xml,
+    store_products_in_database, sales_analytics, CartItem, Category, Order, Product, User
+)
+
+
+def seed(products, orders, reviews):
+    db.drop_all()
+    db.create_all()
+    catalog = list(read_products_from_xml(CATALOG_XML))
+    # Extra products are renamed copies of the catalog ("Sonos One #2", ...)
+    store_products_in_database(
+        dict(catalog[position % len(catalog)], name=f"{catalog[position % len(catalog)]['name']} #{position // len(catalog) + 1}")
+        for position in range(max(products - len(catalog), 0))
+    )
+    initialize_product_data(CATALOG_XML, order_count=orders)
+    # Plenty of stock, so cart and checkout scenarios never fail on inventory
+    Product.query.update({Product.available_items: 1000000}, synchronize_session=False)
+    db.session.commit()
+    catalog_cache.bump()
+
+
+def seed_reviews(count, batch_size=1000):
+    for collection in (get_reviews_collection(), get_flags_collection(), get_review_stats_collection()):
+        collection.drop()
+    prepare_reviews_collection()
+    product_names = [name for (name,) in db.session.query(Product.name)]
+    documents = sample_reviews(count, product_names)
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            break
+        insert_reviews(batch)
+
+
+class Sample:
+    # Ids and names the scenarios build their requests from
+    def __init__(self, client):
+        self.client = client
+        self.products = db.session.query(
+            Product.id, Product.name, Product.price, Product.category_id, Category.name.label('category_name')
+        ).join(Category).order_by(Product.id).limit(200).all()
+        self.product_ids = [product.id for product in self.products]
+        self.product_names = [product.name for product in self.products]
+        self.quoted_names = [quote(name, safe='') for name in self.product_names]
+        order = Order.query.order_by(Order.id).first()
+        self.user_name = order.user_name if order else 'John Doe'
+        self.order_ids = [order_id for (order_id,) in db.session.query(Order.id).order_by(Order.id.desc()).limit(200)]
+        self.user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id).limit(20)]
+        self.cart_owner = 'benchmark-cart'
+        self.cart_item_ids = [self.add_to_cart(self.cart_owner, product_id) for product_id in self.product_ids[:10]]
+        self.serial = 0  # Keeps generated emails, names and confirmation numbers unique
+
+    def next_serial(self):
+        self.serial += 1
+        return f"{os.getpid()}-{int(time.time())}-{self.serial}"
+
+    def post(self, path, body, headers=None, method='POST'):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        if response.status_code >= 400:
+            raise RuntimeError(f"Setup request {method} {path} failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+        return response.get_json()
+
+    def add_to_cart(self, owner, product_id):
+        self.post('/api/cart/add', cart_item(product_id), {'X-User-Id': owner})
+        # The response does not include the new item's id
+        return db.session.query(db.func.max(CartItem.id)).filter_by(user_id=owner).scalar()
+
+    def cart_owner_with_item(self):
+        owner = f"benchmark-clear-{self.next_serial()}"
+        self.add_to_cart(owner, self.product_ids[0])
+        return owner
+
+    def add_order(self):
+        return self.post('/api/orders/add', order_body(self.product_ids[:2]))['order_id']
+
+    def add_order_confirmation(self):
+        return db.session.get(Order, self.add_order()).confirmation_number
+
+    def add_product(self):
+        body = product_body(self.products[0], f"Benchmark Product {self.next_serial()}", self.products[0].category_name)
+        self.post('/api/products/add', body)
+        return db.session.query(Product.id).filter_by(name=body['name']).scalar()
+
+    def register(self):
+        email = f"benchmark-{self.next_serial()}@example.com"
+        self.post('/api/register', user_body(email))
+        return db.session.query(User.id).filter_by(email=email).scalar()
+
+
+def cart_item(product_id):
+    return {'product_id': product_id, 'quantity': 1, 'warranty': 'No Warranty', 'accessories': [], 'total_price': 99.99}
+
+
+def order_body(product_ids, confirmation_number=None):
+    today = datetime.utcnow().date()
+    body = {
+        'user_name': 'Benchmark User', 'street': '1 Load St', 'city': 'Chicago', 'state': 'IL', 'zip_code': '60601',
+        'credit_card': '4111111111111111', 'delivery_option': 'delivery',
+        'order_items': [{'id': product_id, 'quantity': 1} for product_id in product_ids],
+        'total_amount': 199.98, 'order_date': today.isoformat(), 'delivery_date': (today + timedelta(days=14)).isoformat()
+    }
+    if confirmation_number:
+        body['confirmation_number'] = confirmation_number
+    return body
+
+
+def checkout_body(product_ids, confirmation_number):
+    return {
+        'name': 'Benchmark User', 'street': '1 Load St', 'city': 'Chicago', 'state': 'IL', 'zipCode': '60601',
+        'creditCard': '4111111111111111', 'deliveryOption': 'delivery', 'totalAmount': 199.98,
+        'confirmationNumber': confirmation_number,
+        'deliveryDate': (datetime.utcnow() + timedelta(days=14)).strftime('%a %b %d %Y'),
+        'cartItems': [{'product_id': product_id, 'quantity': 1, 'total_price': 99.99} for product_id in product_ids]
+    }
+
+
+def product_body(product, name, category):
+    # add takes a category name, update a category id
+    return {
+        'name': name, 'description': 'Load test product', 'price': product.price, 'category': category,
+        'accessories': [], 'warranty_options': ['1 Year'], 'retailer_discount': 0, 'manufacturer_rebate': 0,
+        'available_items': 1000000
+    }
+
+
+def user_body(email):
+    return {'name': 'Benchmark User', 'email': email, 'password': 'password123', 'street': '1 Load St',
+            'city': 'Chicago', 'state': 'IL', 'zipCode': '60601'}
+
+
+def review_body(sample, position):
+    return {'ProductModelName': sample.product_names[position % len(sample.product_names)], 'ReviewRating': 4,
+            'ReviewText': 'Benchmark review', 'UserID': 'benchmark'}
+
+
+# name -> (route rule, method, kind, builder(sample, count) -> loadgen requests)
+#   read:    idempotent, warmed up before measuring
+#   write:   repeatable writes
+#   consume: every request uses up a target, so count targets are prepared first
+SCENARIOS = {
+    'products': ('/api/products', 'GET', 'read', lambda s, n: ['/api/products']),
+    'products-page': ('/api/products', 'GET', 'read', lambda s, n: ['/api/products?limit=50&fields=id,name,price']),
+    'product': ('/api/products/<string:product_id>', 'GET', 'read',
+                lambda s, n: [f'/api/products/{product_id}' for product_id in s.product_ids]),
+    'products-batch': ('/api/products/batch', 'GET', 'read',
+                       lambda s, n: [f"/api/products/batch?ids={','.join(s.product_ids[:20])}"]),
+    'products-batch-post': ('/api/products/batch', 'POST', 'read',
+                            lambda s, n: [('POST', '/api/products/batch', {'ids': s.product_ids[:20]})]),
+    'productsget': ('/api/productsget', 'GET', 'read', lambda s, n: ['/api/productsget']),
+    'products-search': ('/api/products/search', 'GET', 'read',
+                        lambda s, n: ['/api/products/search?query=smart', '/api/products/search?query=doorbell']),
+    'products-autocomplete': ('/api/products/autocomplete', 'GET', 'read',
+                              lambda s, n: ['/api/products/autocomplete?prefix=sm', '/api/products/autocomplete?prefix=nest']),
+    'store-locations': ('/api/store-locations', 'GET', 'read', lambda s, n: ['/api/store-locations']),
+    'cart': ('/api/cart', 'GET', 'read', lambda s, n: [('GET', '/api/cart', None, {'X-User-Id': s.cart_owner})]),
+    'login': ('/api/login', 'POST', 'read',
+              lambda s, n: [('POST', '/api/login', {'email': 'john@example.com', 'password': 'password123'})]),
+    'user': ('/api/user/<string:user_id>', 'GET', 'read', lambda s, n: [f'/api/user/{user_id}' for user_id in s.user_ids]),
+    'customers': ('/api/customers', 'GET', 'read', lambda s, n: ['/api/customers?limit=100']),
+    'orders': ('/api/orders', 'GET', 'read', lambda s, n: ['/api/orders?limit=100']),
+    'order-history': ('/api/orderhistory/<string:user_name>', 'GET', 'read',
+                      lambda s, n: [f"/api/orderhistory/{quote(s.user_name, safe='')}"]),
+    'trending-zip-codes': ('/api/trending/zip-codes', 'GET', 'read', lambda s, n: ['/api/trending/zip-codes']),
+    'trending-sold-products': ('/api/trending/sold-products', 'GET', 'read', lambda s, n: ['/api/trending/sold-products']),
+    'trending-liked-products': ('/api/trending/liked-products', 'GET', 'read', lambda s, n: ['/api/trending/liked-products']),
+    'trending': ('/api/trending', 'GET', 'read', lambda s, n: ['/api/trending']),
+    'sales': ('/api/sales', 'GET', 'read', lambda s, n: ['/api/sales']),
+    'daily-sales': ('/api/daily-sales', 'GET', 'read', lambda s, n: ['/api/daily-sales']),
+    'analytics': ('/api/analytics/query', 'GET', 'read', lambda s, n: [
+        '/api/analytics/query?group_by=state',
+        '/api/analytics/query?group_by=city,delivery_option&bucket=month',
+        '/api/analytics/query?group_by=product_id&metrics=units,sales&state=TX',
+    ]),
+    'analytics-post': ('/api/analytics/query', 'POST', 'read', lambda s, n: [
+        ('POST', '/api/analytics/query', {'group_by': ['zip_code'], 'metrics': ['orders', 'avg_order_value'], 'bucket': 'week'})
+    ]),
+    'review-stats': ('/api/product-review-stats', 'GET', 'read',
+                     lambda s, n: [f"/api/product-review-stats?products={','.join(s.quoted_names[:20])}"]),
+    'review-stats-product': ('/api/product-review-stats/<string:product_id>', 'GET', 'read',
+                             lambda s, n: [f'/api/product-review-stats/{name}' for name in s.quoted_names]),
+    'reviews': ('/api/product-reviews', 'GET', 'read', lambda s, n: ['/api/product-reviews?limit=50']),
+    'reviews-by-product': ('/api/product-reviews/<string:product_id>', 'GET', 'read',
+                           lambda s, n: [f'/api/product-reviews/{name}?limit=20' for name in s.quoted_names]),
+
+    'cart-add': ('/api/cart/add', 'POST', 'write', lambda s, n: [
+        ('POST', '/api/cart/add', cart_item(product_id), {'X-User-Id': 'benchmark-cart-add'}) for product_id in s.product_ids
+    ]),
+    'cart-update': ('/api/cart/update/<int:item_id>', 'PUT', 'write', lambda s, n: [
+        ('PUT', f'/api/cart/update/{item_id}', {'quantity': 1 + position % 3}, {'X-User-Id': s.cart_owner})
+        for position, item_id in enumerate(s.cart_item_ids)
+    ]),
+    'place-order': ('/api/place-order', 'POST', 'write', lambda s, n: [
+        ('POST', '/api/place-order', checkout_body(s.product_ids[position % len(s.product_ids):][:2], f'BENCH-{s.next_serial()}'))
+        for position in range(n)
+    ]),
+    'orders-add': ('/api/orders/add', 'POST', 'write', lambda s, n: [
+        ('POST', '/api/orders/add', order_body(s.product_ids[position % len(s.product_ids):][:2])) for position in range(20)
+    ]),
+    'orders-update': ('/api/orders/update/<int:order_id>', 'PUT', 'write', lambda s, n: [
+        ('PUT', f'/api/orders/update/{order_id}', order_body(s.product_ids[:3], f'BENCH-{s.next_serial()}'))
+        for order_id in s.order_ids
+    ]),
+    'register': ('/api/register', 'POST', 'write', lambda s, n: [
+        ('POST', '/api/register', user_body(f'benchmark-{s.next_serial()}@example.com')) for _ in range(n)
+    ]),
+    'user-update': ('/api/user/update/<string:user_id>', 'PUT', 'write', lambda s, n: [
+        ('PUT', f'/api/user/update/{user_id}', dict(user_body(f'benchmark-{s.next_serial()}@example.com'), password=''))
+        for user_id in [s.register() for _ in range(10)]
+    ]),
+    'products-add': ('/api/products/add', 'POST', 'write', lambda s, n: [
+        ('POST', '/api/products/add', product_body(s.products[0], f'Benchmark Product {s.next_serial()}', s.products[0].category_name))
+        for _ in range(n)
+    ]),
+    'products-update': ('/api/products/update/<string:product_id>', 'PUT', 'write', lambda s, n: [
+        ('PUT', f'/api/products/update/{product_id}',
+         product_body(s.products[0], f'Benchmark Product {s.next_serial()}', s.products[0].category_id))
+        for product_id in [s.add_product() for _ in range(10)]
+    ]),
+    'review': ('/api/product-review', 'POST', 'write', lambda s, n: [
+        ('POST', '/api/product-review', review_body(s, position)) for position in range(20)
+    ]),
+    'reviews-bulk': ('/api/product-reviews/bulk', 'POST', 'write', lambda s, n: [
+        ('POST', '/api/product-reviews/bulk', [review_body(s, position) for position in range(50)])
+    ]),
+
+    'cart-remove': ('/api/cart/remove/<int:item_id>', 'DELETE', 'consume', lambda s, n: [
+        ('DELETE', f'/api/cart/remove/{s.add_to_cart("benchmark-cart-remove", s.product_ids[position % len(s.product_ids)])}',
+         None, {'X-User-Id': 'benchmark-cart-remove'}) for position in range(n)
+    ]),
+    'cart-clear': ('/api/cart/clear', 'DELETE', 'consume', lambda s, n: [
+        ('DELETE', '/api/cart/clear', None, {'X-User-Id': s.cart_owner_with_item()}) for _ in range(n)
+    ]),
+    'orders-cancel': ('/api/orders/cancel/<string:confirmation_number>', 'PUT', 'consume', lambda s, n: [
+        ('PUT', f'/api/orders/cancel/{s.add_order_confirmation()}') for _ in range(n)
+    ]),
+    'orders-delete': ('/api/orders/delete/<int:order_id>', 'DELETE', 'consume', lambda s, n: [
+        ('DELETE', f'/api/orders/delete/{s.add_order()}') for _ in range(n)
+    ]),
+    'products-delete': ('/api/products/delete/<string:product_id>', 'DELETE', 'consume', lambda s, n: [
+        ('DELETE', f'/api/products/delete/{s.add_product()}') for _ in range(n)
+    ]),
+    'user-delete': ('/api/user/delete/<string:user_id>', 'DELETE', 'consume', lambda s, n: [
+        ('DELETE', f'/api/user/delete/{s.register()}') for _ in range(n)
+    ]),
+}
+KINDS = ('read', 'write', 'consume')
+
+
+def uncovered_routes(scenarios):
+    covered = {(SCENARIOS[name][0], SCENARIOS[name][1]) for name in scenarios}
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if rule.rule.startswith('/api/'):
+            routes.update((rule.rule, method) for method in rule.methods - {'HEAD', 'OPTIONS'})
+    return sorted(routes - covered)
+
+
+def start_server():
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='benchmark-server', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline):
+    print(f"{'scenario':<24} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql/req':>8} {'mongo/req':>9} {'errors':>7}"
+          + (f" {'p50 vs base':>12}" if baseline else ''))
+    for name, summary in results.items():
+        line = (f"{name:<24} {summary['throughput_rps']!s:>9} {summary['p50_ms']!s:>8} {summary['p95_ms']!s:>8} "
+                f"{summary['p99_ms']!s:>8} {summary['sql_per_request']!s:>8} {summary['mongo_per_request']!s:>9} {summary['errors']:>7}")
+        before = (baseline or {}).get(name)
+        if before and before.get('p50_ms') and summary['p50_ms']:
+            line += f" {summary['p50_ms'] / before['p50_ms']:>11.2f}x"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test every /api/* route of the backend')
+    parser.add_argument('--seed', action='store_true', default=SEED_BY_DEFAULT,
+                        help='Recreate the tables and reviews and load sample data first')
+    parser.add_argument('--products', type=int, default=200, help='Products to seed (catalog copies beyond ProductCatalog.xml)')
+    parser.add_argument('--orders', type=int, default=5000, help='Sample orders to seed')
+    parser.add_argument('--reviews', type=int, default=5000, help='Sample reviews to seed')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='Default: all')
+    parser.add_argument('--kind', action='append', choices=KINDS, help='Only scenarios of this kind (default: all)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', help='Earlier --output file to compare p50 latency against')
+    args = parser.parse_args(argv)
+
+    scenarios = [name for name in (args.scenario or SCENARIOS) if SCENARIOS[name][2] in (args.kind or KINDS)]
+    scenarios.sort(key=lambda name: KINDS.index(SCENARIOS[name][2]))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    shutil.copy(CATALOG_XML, os.path.join(WORK_DIR, 'ProductCatalog.xml'))
+    catalog_xml.path = os.path.join(WORK_DIR, 'ProductCatalog.xml')
+
+    with app.app_context():
+        started = time.perf_counter()
+        if args.seed:
+            seed(args.products, args.orders, args.reviews)
+        if args.seed or USE_MONGOMOCK:
+            seed_reviews(args.reviews)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s" if args.seed else 'Using the existing database')
+        event.listen(db.engine, 'before_cursor_execute', counter.count_sql)
+        environment = {
+            'database': db.engine.dialect.name,
+            'mongo': 'mongomock' if USE_MONGOMOCK else 'mongod',
+            'analytics': sales_analytics is not None,
+            'products': Product.query.count(),
+            'orders': Order.query.count(),
+            'reviews': get_reviews_collection().estimated_document_count(),
+        }
+        sample = Sample(app.test_client())
+
+    if not args.scenario and not args.kind:
+        for route, method in uncovered_routes(scenarios):
+            print(f"Not covered: {method} {route}")
+
+    server, base_url = start_server()
+    results = {}
+    try:
+        for name in scenarios:
+            route, method, kind, build = SCENARIOS[name]
+            with app.app_context():
+                requests = build(sample, args.requests)
+                db.session.remove()
+            if kind == 'read':
+                run_load(base_url, requests, min(args.requests, args.concurrency * 4), args.concurrency)  # Warm-up
+            sql_before, mongo_before = counter.snapshot()
+            summary = run_load(base_url, requests, args.requests, args.concurrency).summary()
+            sql_after, mongo_after = counter.snapshot()
+            summary.update({
+                'route': f'{method} {route}',
+                'kind': kind,
+                'sql_per_request': round((sql_after - sql_before) / max(summary['requests'], 1), 2),
+                'mongo_per_request': round((mongo_after - mongo_before) / max(summary['requests'], 1), 2),
+            })
+            results[name] = summary
+    finally:
+        server.shutdown()
+
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({
+                'commit': git_commit(),
+                'generated_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'environment': environment,
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'results': results
+            }, output_file, indent=2)
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    return 0 if all(summary['errors'] == 0 for summary in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
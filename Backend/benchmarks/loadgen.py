@@ -0,0 +1,145 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+
+# Minimal closed-loop HTTP/1.1 load generator (stdlib only).
+#
+# `concurrency` keep-alive connections each send a request, wait for the full
+# response and send the next one, until `total_requests` have been issued.
+# Everything runs on one event loop, so the client itself is not what limits
+# throughput the way a thread-per-request urllib client would be.
+#
+# `requests` is a list replayed round-robin. Each entry is a path (a GET) or a
+# tuple (method, path[, body[, headers]]); a body that is not bytes is sent as
+# JSON.
+
+class LoadResult:
+    def __init__(self, latencies, errors, statuses, elapsed):
+        self.latencies = latencies  # seconds, successful requests only
+        self.errors = errors
+        self.statuses = statuses
+        self.elapsed = elapsed
+
+    def percentile(self, p):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def summary(self):
+        def ms(value):
+            return round(value * 1000, 2) if value is not None else None
+        return {
+            'requests': len(self.latencies) + self.errors,
+            'errors': self.errors,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'elapsed_s': round(self.elapsed, 3),
+            'throughput_rps': round(len(self.latencies) / self.elapsed, 1) if self.elapsed else None,
+            'p50_ms': ms(self.percentile(50)),
+            'p95_ms': ms(self.percentile(95)),
+            'p99_ms': ms(self.percentile(99)),
+        }
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    chunked = headers.get('transfer-encoding', '').lower() == 'chunked'
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)  # chunk + CRLF
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()  # Body delimited by connection close
+
+    framed = chunked or 'content-length' in headers
+    return status, framed and headers.get('connection', '').lower() != 'close'
+
+
+def _encode_request(request, host, port, prefix, extra_headers):
+    if isinstance(request, str):
+        request = ('GET', request)
+    method, path, body, headers = (tuple(request) + (None, None))[:4]
+    head = f'{method} {prefix}{path} HTTP/1.1\r\nHost: {host}:{port}\r\n{extra_headers}'
+    head += ''.join(f'{name}: {value}\r\n' for name, value in (headers or {}).items())
+    if body is not None:
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+            if not any(name.lower() == 'content-type' for name in (headers or {})):
+                head += 'Content-Type: application/json\r\n'
+        head += f'Content-Length: {len(body)}\r\n'
+    return (head + 'Connection: keep-alive\r\n\r\n').encode('latin-1') + (body or b'')
+
+
+async def _worker(host, port, requests, counter, result_state):
+    reader = writer = None
+    latencies, statuses = result_state['latencies'], result_state['statuses']
+    while True:
+        index = counter['next']
+        if index >= counter['total']:
+            break
+        counter['next'] += 1
+        request = requests[index % len(requests)]
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await _read_response(reader)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            result_state['errors'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        statuses[status] = statuses.get(status, 0) + 1
+        if status >= 500:
+            result_state['errors'] += 1
+        else:
+            latencies.append(time.perf_counter() - started)
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load_async(base_url, requests, total_requests, concurrency, headers=None):
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    prefix = url.path.rstrip('/')
+    extra_headers = ''.join(f'{name}: {value}\r\n' for name, value in (headers or {}).items())
+    # Encoded up front so request building is not part of the measured latency
+    requests = [_encode_request(request, host, port, prefix, extra_headers) for request in requests]
+
+    counter = {'next': 0, 'total': total_requests}
+    state = {'latencies': [], 'statuses': {}, 'errors': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(host, port, requests, counter, state) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    return LoadResult(state['latencies'], state['errors'], state['statuses'], elapsed)
+
+
+def run_load(base_url, requests, total_requests=1000, concurrency=32, headers=None):
+    return asyncio.run(run_load_async(base_url, requests, total_requests, concurrency, headers))
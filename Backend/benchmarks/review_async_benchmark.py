@@ -0,0 +1,75 @@
+import argparse
+import json
+import sys
+import urllib.request
+from urllib.parse import quote
+
+from loadgen import run_load
+
+# Throughput of the sync review blueprint vs AsyncReviewService under the same
+# concurrent load. Both servers must be running against the same mongod, e.g.
+# from the Backend folder:
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app                      # :5001
+#   uvicorn AsyncReviewService:app --port 5002 --workers 2
+#   python benchmarks/review_async_benchmark.py --concurrency 64 --requests 5000
+#
+# Each scenario replays the Mongo calls a page view makes (ProductReviews for a
+# product, a paged review list, the Trending top-liked panel) round-robin.
+
+SCENARIOS = {
+    'reviews-by-product': lambda products: [
+        f'/api/product-reviews/{quote(product, safe="")}?limit=20' for product in products
+    ],
+    'reviews-page': lambda products: ['/api/product-reviews?limit=50'],
+    'top-liked': lambda products: ['/api/trending/liked-products'],
+}
+
+
+def sample_products(base_url, count):
+    with urllib.request.urlopen(f'{base_url}/api/product-reviews?limit=500&fields=ProductModelName') as response:
+        items = json.load(response)['items']
+    products = sorted({item['ProductModelName'] for item in items if item.get('ProductModelName')})
+    return products[:count] or ['unknown']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark sync vs async review endpoints')
+    parser.add_argument('--sync-url', default='http://127.0.0.1:5001')
+    parser.add_argument('--async-url', default='http://127.0.0.1:5002')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per scenario and server')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--products', type=int, default=20, help='Distinct products to spread lookups over')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help='Default: all')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    products = sample_products(args.sync_url, args.products)
+    servers = {'sync': args.sync_url, 'async': args.async_url}
+    results = {}
+
+    for scenario in args.scenario or sorted(SCENARIOS):
+        paths = SCENARIOS[scenario](products)
+        results[scenario] = {}
+        for label, base_url in servers.items():
+            run_load(base_url, paths, min(args.requests, args.concurrency * 4), args.concurrency)  # Warm-up
+            results[scenario][label] = run_load(base_url, paths, args.requests, args.concurrency).summary()
+
+    print(f"{'scenario':<20} {'server':<6} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for scenario, by_server in results.items():
+        for label, summary in by_server.items():
+            print(f"{scenario:<20} {label:<6} {summary['throughput_rps']!s:>9} {summary['p50_ms']!s:>8} "
+                  f"{summary['p95_ms']!s:>8} {summary['p99_ms']!s:>8} {summary['errors']:>7}")
+        sync_rps, async_rps = by_server['sync']['throughput_rps'], by_server['async']['throughput_rps']
+        if sync_rps and async_rps:
+            print(f"{'':<20} async/sync throughput: {async_rps / sync_rps:.2f}x")
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'concurrency': args.concurrency, 'requests': args.requests, 'results': results},
+                      output_file, indent=2)
+    return 0 if all(s['errors'] == 0 for r in results.values() for s in r.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
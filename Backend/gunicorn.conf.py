@@ -0,0 +1,22 @@
+import multiprocessing
+import os
+
+# gunicorn -c gunicorn.conf.py wsgi:app
+bind = os.environ.get('BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+# Boot once in the master, then fork workers from it
+preload_app = True
+
+
+def post_fork(server, worker):
+    from MySQLDataStoreUtilities import init_worker
+    init_worker()
+
+
+def worker_exit(server, worker):
+    # Write out reviews still waiting in the write-behind queue
+    from MongoDBDataStoreUtilities import close_review_queue
+    close_review_queue()
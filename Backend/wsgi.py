@@ -0,0 +1,5 @@
+# WSGI entry point, e.g.:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+from MySQLDataStoreUtilities import create_app
+
+app = create_app()
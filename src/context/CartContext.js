@@ -3,6 +3,20 @@ import { BASE_URL } from './config';
 
 export const CartContext = createContext();
 
+// Carts are per shopper: the logged-in user's id, or a random id kept for this browser
+export const getCartOwnerId = () => {
+  const userId = localStorage.getItem('userId');
+  if (userId) {
+    return userId;
+  }
+  let sessionId = localStorage.getItem('cartSessionId');
+  if (!sessionId) {
+    sessionId = window.crypto.randomUUID();
+    localStorage.setItem('cartSessionId', sessionId);
+  }
+  return sessionId;
+};
+
 export const CartProvider = ({ children }) => {
   const [cartItems, setCartItems] = useState([]);
 
@@ -13,7 +27,8 @@ export const CartProvider = ({ children }) => {
   const fetchCartItems = () => {
     fetch(`${BASE_URL}/cart`, {
       headers: {
-        'ngrok-skip-browser-warning': 'true'
+        'ngrok-skip-browser-warning': 'true',
+        'X-User-Id': getCartOwnerId()
       }
     })
       .then(response => {
@@ -36,6 +51,7 @@ export const CartProvider = ({ children }) => {
         headers: {
           'Content-Type': 'application/json',
           'ngrok-skip-browser-warning': 'true',
+          'X-User-Id': getCartOwnerId(),
         }, 
 
         
@@ -58,7 +74,8 @@ export const CartProvider = ({ children }) => {
       const response = await fetch(`${BASE_URL}/cart/remove/${itemId}`, {
         method: 'DELETE',
         headers: {
-          'ngrok-skip-browser-warning': 'true'
+          'ngrok-skip-browser-warning': 'true',
+          'X-User-Id': getCartOwnerId()
         }
       });
       if (response.ok) {
@@ -79,6 +96,7 @@ export const CartProvider = ({ children }) => {
         headers: {
           'Content-Type': 'application/json',
           'ngrok-skip-browser-warning': 'true',
+          'X-User-Id': getCartOwnerId(),
         },
         body: JSON.stringify({ quantity: newQuantity }),
       });
@@ -98,7 +116,8 @@ export const CartProvider = ({ children }) => {
       const response = await fetch(`${BASE_URL}/cart/clear`, {
         method: 'DELETE', 
           headers: {
-            'ngrok-skip-browser-warning': 'true'
+            'ngrok-skip-browser-warning': 'true',
+            'X-User-Id': getCartOwnerId()
           }
         });
       if (response.ok) {
@@ -1,6 +1,6 @@
 import React, { useState, useContext, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { CartContext } from '../context/CartContext';
+import { CartContext, getCartOwnerId } from '../context/CartContext';
 import { BASE_URL } from './config';
 
 function Checkout() {
@@ -75,6 +75,7 @@ function Checkout() {
     const orderData = {
       ...customerInfo,
       cartItems: cartItems.map(item => ({
+        id: item.id,  // Lets the backend convert this cart item's inventory hold
         product_id: item.product_id,
         product_name: item.product_name,
         quantity: item.quantity,
@@ -95,6 +96,7 @@ function Checkout() {
         headers: {
           'Content-Type': 'application/json',
           'ngrok-skip-browser-warning': 'true',
+          'X-User-Id': getCartOwnerId(),  // Only this shopper's cart holds are converted
         },
         body: JSON.stringify(orderData),
       });
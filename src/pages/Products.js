@@ -16,6 +16,7 @@ function Products() {
   const fetchProducts = (query = '') => {
     const searchUrl = query ? `${BASE_URL}/products/search?query=${query}` : `${BASE_URL}/products`;
     fetch(searchUrl, {
+      cache: 'no-cache',  // Revalidate with If-None-Match; the backend answers 304 when the catalog is unchanged
       headers: {
         'ngrok-skip-browser-warning': 'true'
       }
@@ -32,9 +33,9 @@ function Products() {
     const value = e.target.value;
     setSearchTerm(value);
 
-    // Fetch suggestions based on search term
-    if (value.length > 0) {
-      fetch(`${BASE_URL}/products/search?query=${value}`)
+    // Fetch suggestions (names only, answered from the backend's in-memory index)
+    if (value.trim().length > 0) {
+      fetch(`${BASE_URL}/products/autocomplete?prefix=${encodeURIComponent(value)}`)
         .then(response => response.json())
         .then(data => setSuggestions(data))
         .catch(error => console.error('Error fetching suggestions:', error));
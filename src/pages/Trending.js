@@ -12,27 +12,16 @@ const Trending = () => {
   useEffect(() => {
     const fetchTrendingData = async () => {
       try {
-        const [likedProductsRes, zipCodesRes, soldProductsRes] = await Promise.all([
-          axios.get(`${BASE_URL}/trending/liked-products`, {
-            headers: {
-              'ngrok-skip-browser-warning': 'true'
-            }
-          }),
-          axios.get(`${BASE_URL}/trending/zip-codes`, {
-            headers: {
-              'ngrok-skip-browser-warning': 'true'
-            }
-          }),
-          axios.get(`${BASE_URL}/trending/sold-products`, {
-            headers: {
-              'ngrok-skip-browser-warning': 'true'
-            }
-          })
-        ]);
+        // One request for all three lists, served from the backend's trending snapshot
+        const response = await axios.get(`${BASE_URL}/trending`, {
+          headers: {
+            'ngrok-skip-browser-warning': 'true'
+          }
+        });
 
-        setTopLikedProducts(likedProductsRes.data);
-        setTopZipCodes(zipCodesRes.data);
-        setTopSoldProducts(soldProductsRes.data);
+        setTopLikedProducts(response.data.liked_products);
+        setTopZipCodes(response.data.zip_codes);
+        setTopSoldProducts(response.data.sold_products);
         setLoading(false);
       } catch (error) {
         console.error('Error fetching trending data:', error);